@@ -0,0 +1,30 @@
+-- Supabase objects used by app.py. Run once in the SQL editor.
+
+-- Serves both the per-account logo listing and the aggregate view below.
+create index if not exists account_logos_account_id_created_at_idx
+    on account_logos (account_id, created_at desc);
+
+-- One row per account, so the account picker never transfers logo rows.
+create or replace view account_logo_counts as
+select
+    account_id,
+    count(*) as logo_count,
+    max(created_at) as last_upload_at
+from account_logos
+where account_id is not null
+group by account_id;
+
+-- Uploads dedup by content; one lookup per batch filters on both columns, and
+-- the unique index makes concurrent duplicate inserts no-ops (upsert on conflict).
+alter table account_logos add column if not exists content_hash text;
+drop index if exists account_logos_account_id_content_hash_idx;
+
+-- Keep the oldest row of any duplicates from before the unique index existed.
+delete from account_logos a
+using account_logos b
+where a.account_id = b.account_id
+  and a.content_hash = b.content_hash
+  and (a.created_at, a.ctid) > (b.created_at, b.ctid);
+
+create unique index if not exists account_logos_account_id_content_hash_key
+    on account_logos (account_id, content_hash);
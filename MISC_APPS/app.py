@@ -1,40 +1,249 @@
+import hashlib
 import io
-from typing import List, Optional
+import mimetypes
+import os
+import tempfile
+import threading
+import time
+import zipfile
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import streamlit as st
 from supabase import Client, create_client
 
+from image_variants import VARIANT_SIZES, render_variants, sibling_variant, variant_path
+
 BUCKET_NAME = st.secrets.get("SUPABASE_BUCKET", "logos")
 TABLE_NAME = st.secrets.get("SUPABASE_TABLE", "account_logos")
-SUPPORTED_TYPES = ["png", "jpg", "jpeg", "gif"]
+# Aggregate view defined in account_logos.sql: one row per account with its logo count.
+ACCOUNTS_VIEW = st.secrets.get("SUPABASE_ACCOUNTS_VIEW", "account_logo_counts")
+ACCOUNT_PAGE_SIZE = int(st.secrets.get("ACCOUNT_PAGE_SIZE", 100))
+ACCOUNTS_TTL_SECONDS = int(st.secrets.get("ACCOUNTS_TTL_SECONDS", 30))
+LOGOS_TTL_SECONDS = int(st.secrets.get("LOGOS_TTL_SECONDS", 300))
+LOGOS_CACHE_ENTRIES = int(st.secrets.get("LOGOS_CACHE_ENTRIES", 256))
+SUPPORTED_TYPES = ["png", "jpg", "jpeg", "gif", "webp"]
+TRANSFER_WORKERS = int(st.secrets.get("TRANSFER_WORKERS", 16))
+GALLERY_COLUMNS = 4
+THUMBNAIL_SIZE = int(st.secrets.get("THUMBNAIL_SIZE", 256))
+CACHE_DIR = Path(st.secrets.get("LOGO_CACHE_DIR", Path(tempfile.gettempdir()) / "logo_cache"))
+MEMORY_CACHE_BYTES = int(st.secrets.get("LOGO_MEMORY_CACHE_BYTES", 64 * 1024 * 1024))
+DISK_CACHE_BYTES = int(st.secrets.get("LOGO_DISK_CACHE_BYTES", 512 * 1024 * 1024))
+MAX_BULK_FILES = int(st.secrets.get("MAX_BULK_FILES", 1000))
+MAX_BULK_FILE_BYTES = int(st.secrets.get("MAX_BULK_FILE_BYTES", 20 * 1024 * 1024))
+MAX_BULK_TOTAL_BYTES = int(st.secrets.get("MAX_BULK_TOTAL_BYTES", 256 * 1024 * 1024))
+UPLOAD_ATTEMPTS = 3
+HASH_LOOKUP_CHUNK = 100
+LOGO_UNIQUE_COLUMNS = "account_id,content_hash"  # see account_logos.sql
+
+
+class LogoCache:
+    """Two-level LRU (memory, then disk) of image bytes keyed by storage path.
+
+    Stored objects are never overwritten in place (uploads do not upsert), so
+    entries stay valid until evicted by the size caps.
+    """
+
+    def __init__(self, cache_dir: Path, memory_bytes: int, disk_bytes: int) -> None:
+        self.cache_dir = cache_dir
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Index existing files oldest-first so disk eviction never rescans the directory.
+        entries = sorted(self.cache_dir.glob("*.bin"), key=lambda p: p.stat().st_mtime)
+        self._disk: "OrderedDict[str, int]" = OrderedDict((p.name, p.stat().st_size) for p in entries)
+        self._disk_size = sum(self._disk.values())
+
+    @staticmethod
+    def _file_name(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest() + ".bin"
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+            name = self._file_name(key)
+            if name not in self._disk:
+                return None
+            self._disk.move_to_end(name)
+        path = self.cache_dir / name
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        self._remember(key, data)
+        name = self._file_name(key)
+        tmp_path = self.cache_dir / f"{name}.{threading.get_ident()}.tmp"
+        try:
+            tmp_path.write_bytes(data)
+            tmp_path.replace(self.cache_dir / name)
+        except OSError:
+            return
+        evicted = []
+        with self._lock:
+            self._disk_size += len(data) - self._disk.pop(name, 0)
+            self._disk[name] = len(data)
+            while self._disk_size > self.disk_bytes and len(self._disk) > 1:
+                old_name, size = self._disk.popitem(last=False)
+                self._disk_size -= size
+                evicted.append(old_name)
+        for old_name in evicted:
+            (self.cache_dir / old_name).unlink(missing_ok=True)
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if len(data) > self.memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_size -= len(previous)
+            self._memory[key] = data
+            self._memory_size += len(data)
+            while self._memory_size > self.memory_bytes:
+                _, old = self._memory.popitem(last=False)
+                self._memory_size -= len(old)
+
+
+@st.cache_resource(show_spinner=False)
+def get_logo_cache() -> LogoCache:
+    return LogoCache(CACHE_DIR, MEMORY_CACHE_BYTES, DISK_CACHE_BYTES)
+
+
+@st.cache_resource(show_spinner=False)
+def get_transfer_pool() -> ThreadPoolExecutor:
+    """Shared pool for storage downloads and uploads."""
+    return ThreadPoolExecutor(max_workers=TRANSFER_WORKERS, thread_name_prefix="logo-transfer")
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def is_duplicate_error(exc: Exception) -> bool:
+    message = str(exc).lower()
+    return "duplicate" in message or "already exists" in message
+
+def upload_bytes(client: Client, storage_path: str, data: bytes, attempts: int = UPLOAD_ATTEMPTS) -> None:
+    """Upload with exponential backoff; raises after the last attempt.
+
+    Safe to call from worker threads (no Streamlit calls).
+    """
+    content_type = mimetypes.guess_type(storage_path)[0] or "application/octet-stream"
+    for attempt in range(attempts):
+        try:
+            client.storage.from_(BUCKET_NAME).upload(
+                path=storage_path, file=data, file_options={"content-type": content_type}
+            )
+            return
+        except Exception as exc:
+            if is_duplicate_error(exc) or attempt == attempts - 1:
+                raise
+            time.sleep(0.5 * 2 ** attempt)
+
+def store_logo_variants(client: Client, account_id: str, data: bytes) -> str:
+    """Resize/re-encode an upload, store every variant and return the original's path.
+
+    Paths are content-addressed, so an object that already exists holds the
+    same bytes and is kept. Raises on failure; safe to call from worker threads.
+    """
+    digest = content_hash(data)
+    written: List[str] = []
+    try:
+        for variant, encoded in render_variants(data).items():
+            path = variant_path(account_id, digest, variant)
+            try:
+                upload_bytes(client, path, encoded)
+            except Exception as exc:
+                if not is_duplicate_error(exc):
+                    raise
+                continue
+            written.append(path)
+    except Exception:
+        if written:
+            client.storage.from_(BUCKET_NAME).remove(written)
+        raise
+    return variant_path(account_id, digest, "original")
 
 def upload_file(client: Client, uploaded_file, account_id: str) -> Optional[str]:
-    file_name = uploaded_file.name
-    storage_path = f"{account_id}/{file_name}"
-    file_bytes = uploaded_file.getvalue()
     try:
-        client.storage.from_(BUCKET_NAME).upload(path=storage_path,file=file_bytes)
-        return storage_path
+        return store_logo_variants(client, account_id, uploaded_file.getvalue())
     except Exception as exc:
         st.error(f"Upload failed: {exc}")
         return None
 
-def download_file(client: Client, storage_path: str) -> Optional[io.BytesIO]:
-    try:
-        data = client.storage.from_(BUCKET_NAME).download(storage_path)
-        return io.BytesIO(data)
-    except Exception as exc:
-        st.error(f"Download failed: {exc}")
-        return None
+def thumbnail_options(size: int = THUMBNAIL_SIZE) -> dict:
+    """Ask Supabase image transformation for a resized rendition."""
+    return {"transform": {"width": size, "height": size, "resize": "contain"}}
+
+
+def fetch_thumbnail(client: Client, storage_path: str, cache: LogoCache) -> bytes:
+    """Return thumbnail bytes from cache or storage; raises on storage errors.
+
+    Processed uploads have a stored thumbnail variant; legacy raw uploads fall
+    back to a storage-side transform. Runs on worker threads, so it must not
+    call Streamlit.
+    """
+    thumbnail_path = sibling_variant(storage_path, "thumbnail")
+    key = f"thumb:{thumbnail_path}" if thumbnail_path else f"thumb:{THUMBNAIL_SIZE}:{storage_path}"
+    data = cache.get(key)
+    if data is None:
+        bucket = client.storage.from_(BUCKET_NAME)
+        if thumbnail_path:
+            data = bucket.download(thumbnail_path)
+        else:
+            data = bucket.download(storage_path, thumbnail_options())
+        cache.put(key, data)
+    return data
+
+
+def fetch_thumbnails(
+    client: Client, storage_paths: Iterable[str]
+) -> Tuple[Dict[str, bytes], Dict[str, str]]:
+    """Fetch all thumbnails concurrently; return (images, errors) keyed by storage path."""
+    cache = get_logo_cache()
+    paths = list(dict.fromkeys(storage_paths))
+    futures = {path: get_transfer_pool().submit(fetch_thumbnail, client, path, cache) for path in paths}
+    images: Dict[str, bytes] = {}
+    errors: Dict[str, str] = {}
+    for path, future in futures.items():
+        try:
+            images[path] = future.result()
+        except Exception as exc:
+            errors[path] = str(exc)
+    return images, errors
+
 
-def record_logo_entry(client: Client, account_id: str, file_name: str, storage_path: str) -> bool:
+def record_logo_entry(
+    client: Client,
+    account_id: str,
+    file_name: str,
+    storage_path: str,
+    content_hash: Optional[str] = None,
+) -> bool:
     payload = {
         "account_id": account_id,
         "file_name": file_name,
         "storage_path": storage_path,
+        "content_hash": content_hash,
     }
     try:
-        response = client.table(TABLE_NAME).insert(payload).execute()
+        # The unique (account_id, content_hash) index turns a concurrent duplicate into a no-op.
+        response = (
+            client.table(TABLE_NAME)
+            .upsert(payload, on_conflict=LOGO_UNIQUE_COLUMNS, ignore_duplicates=True)
+            .execute()
+        )
     except Exception as exc:
         st.error(f"Storing logo metadata failed: {exc}")
         return False
@@ -48,41 +257,225 @@ def record_logo_entry(client: Client, account_id: str, file_name: str, storage_p
     return True
 
 
-def fetch_accounts(client: Client) -> List[str]:
-    """Fetch a sorted list of distinct account IDs that have logos."""
+def expand_bulk_files(uploaded_files) -> Tuple[List[Tuple[str, bytes]], List[Dict[str, str]]]:
+    """Flatten uploads and zip archives into (file_name, bytes) pairs plus skip notes.
+
+    Zip members are checked against the file count, per-file size and total
+    size limits using their ``infolist()`` sizes before anything is
+    decompressed; zipfile stops reading a member at its declared size.
+    """
+    files: List[Tuple[str, bytes]] = []
+    skipped: List[Dict[str, str]] = []
+    total_bytes = 0
+
+    def over_limits(name: str, size: int) -> bool:
+        if len(files) >= MAX_BULK_FILES:
+            detail = f"over the {MAX_BULK_FILES} file limit"
+        elif size > MAX_BULK_FILE_BYTES:
+            detail = f"larger than {MAX_BULK_FILE_BYTES / (1024 * 1024):g} MB"
+        elif total_bytes + size > MAX_BULK_TOTAL_BYTES:
+            detail = f"over the {MAX_BULK_TOTAL_BYTES / (1024 * 1024):g} MB total limit"
+        else:
+            return False
+        skipped.append({"file_name": name, "status": "skipped", "detail": detail})
+        return True
+
+    for uploaded in uploaded_files:
+        if Path(uploaded.name).suffix.lower() != ".zip":
+            if not over_limits(uploaded.name, uploaded.size):
+                files.append((uploaded.name, uploaded.getvalue()))
+                total_bytes += uploaded.size
+            continue
+        try:
+            with zipfile.ZipFile(io.BytesIO(uploaded.getvalue())) as archive:
+                for member in archive.infolist():
+                    name = Path(member.filename).name
+                    if member.is_dir() or member.filename.startswith("__MACOSX/") or name.startswith("."):
+                        continue
+                    if Path(name).suffix.lower().lstrip(".") not in SUPPORTED_TYPES:
+                        skipped.append({"file_name": member.filename, "status": "skipped", "detail": "unsupported type"})
+                        continue
+                    if over_limits(member.filename, member.file_size):
+                        continue
+                    try:
+                        data = archive.read(member)
+                    except (RuntimeError, NotImplementedError, zipfile.BadZipFile, zlib.error) as exc:
+                        # Encrypted members raise RuntimeError, unsupported compression NotImplementedError.
+                        skipped.append({"file_name": member.filename, "status": "failed", "detail": f"unreadable: {exc}"})
+                        continue
+                    files.append((name, data))
+                    total_bytes += member.file_size
+        except zipfile.BadZipFile as exc:
+            skipped.append({"file_name": uploaded.name, "status": "failed", "detail": f"bad zip: {exc}"})
+    return files, skipped
+
+
+def fetch_existing_hashes(client: Client, account_id: str, hashes: List[str]) -> Dict[str, str]:
+    """Map content hashes already stored for the account to their storage paths."""
+    existing: Dict[str, str] = {}
+    for start in range(0, len(hashes), HASH_LOOKUP_CHUNK):
+        response = (
+            client.table(TABLE_NAME)
+            .select("content_hash, storage_path")
+            .eq("account_id", account_id)
+            .in_("content_hash", hashes[start:start + HASH_LOOKUP_CHUNK])
+            .execute()
+        )
+        for row in getattr(response, "data", None) or []:
+            existing[row["content_hash"]] = row["storage_path"]
+    return existing
+
+
+def bulk_upload_logos(
+    client: Client, account_id: str, files: List[Tuple[str, bytes]]
+) -> List[Dict[str, str]]:
+    """Dedup by content, upload concurrently, then insert all metadata rows at once.
+
+    Returns one result row per input file.
+    """
+    results: List[Dict[str, str]] = []
+    seen: Dict[str, str] = {}
+    unique: List[Tuple[str, bytes, str]] = []
+    for name, data in files:
+        digest = content_hash(data)
+        if digest in seen:
+            results.append({"file_name": name, "status": "duplicate", "detail": f"same content as {seen[digest]}"})
+            continue
+        seen[digest] = name
+        unique.append((name, data, digest))
+
     try:
-        response = client.table(TABLE_NAME).select("account_id").execute()
-        data = getattr(response, "data", None) or []
-        accounts = {item.get("account_id") for item in data if item.get("account_id")}
-        return sorted(accounts)
+        existing = fetch_existing_hashes(client, account_id, [digest for _, _, digest in unique])
     except Exception as exc:
-        st.error(f"Could not load accounts: {exc}")
-        return []
+        return results + [
+            {"file_name": name, "status": "failed", "detail": f"duplicate check failed: {exc}"}
+            for name, _, _ in unique
+        ]
 
-def fetch_logos_for_account(client: Client, account_id: str):
+    futures = {}
+    for name, data, digest in unique:
+        if digest in existing:
+            results.append({"file_name": name, "status": "duplicate", "storage_path": existing[digest], "detail": "already stored"})
+            continue
+        future = get_transfer_pool().submit(store_logo_variants, client, account_id, data)
+        futures[future] = (name, digest)
+
+    payloads = []
+    for future, (name, digest) in futures.items():
+        try:
+            storage_path = future.result()
+        except Exception as exc:
+            results.append({"file_name": name, "status": "failed", "detail": str(exc)})
+            continue
+        payloads.append({
+            "account_id": account_id,
+            "file_name": name,
+            "storage_path": storage_path,
+            "content_hash": digest,
+        })
+
+    if not payloads:
+        return results
     try:
         response = (
             client.table(TABLE_NAME)
-            .select("account_id, file_name, storage_path, created_at")
-            .eq("account_id", account_id)
-            .order("created_at", desc=True)
+            .upsert(payloads, on_conflict=LOGO_UNIQUE_COLUMNS, ignore_duplicates=True)
             .execute()
         )
-        return getattr(response, "data", None) or []
+        error = getattr(response, "error", None)
+        if error:
+            raise RuntimeError(getattr(error, "message", str(error)))
+    except Exception as exc:
+        # Without metadata the objects are unreachable; remove them in one call.
+        try:
+            client.storage.from_(BUCKET_NAME).remove([
+                sibling_variant(p["storage_path"], variant)
+                for p in payloads
+                for variant in VARIANT_SIZES
+            ])
+        except Exception:
+            pass
+        return results + [
+            {"file_name": p["file_name"], "status": "failed", "storage_path": p["storage_path"], "detail": f"metadata insert failed: {exc}"}
+            for p in payloads
+        ]
+    return results + [
+        {"file_name": p["file_name"], "status": "uploaded", "storage_path": p["storage_path"], "detail": ""}
+        for p in payloads
+    ]
+
+
+@st.cache_resource(show_spinner=False)
+def get_account_versions() -> Dict[str, int]:
+    """Per-account counters bumped on upload; part of the logo cache key."""
+    return {}
+
+
+def invalidate_account(account_id: str) -> None:
+    versions = get_account_versions()
+    versions[account_id] = versions.get(account_id, 0) + 1
+    query_account_page.clear()
+
+
+@st.cache_data(ttl=ACCOUNTS_TTL_SECONDS, show_spinner=False)
+def query_account_page(_client: Client, after: Optional[str], limit: int) -> List[Dict[str, object]]:
+    """One keyset page of (account_id, logo_count) aggregated server-side."""
+    query = _client.table(ACCOUNTS_VIEW).select("account_id, logo_count")
+    if after is not None:
+        query = query.gt("account_id", after)
+    response = query.order("account_id").limit(limit).execute()
+    return getattr(response, "data", None) or []
+
+
+def fetch_accounts(
+    client: Client, after: Optional[str] = None, limit: int = ACCOUNT_PAGE_SIZE
+) -> List[Dict[str, object]]:
+    """Fetch one page of accounts (sorted by ID) with their logo counts."""
+    try:
+        return query_account_page(client, after, limit)
+    except Exception as exc:
+        st.error(f"Could not load accounts: {exc}")
+        return []
+
+
+# Each upload bumps the version in the key, so superseded entries must age out.
+@st.cache_data(ttl=LOGOS_TTL_SECONDS, max_entries=LOGOS_CACHE_ENTRIES, show_spinner=False)
+def query_logos_for_account(_client: Client, account_id: str, version: int):
+    response = (
+        _client.table(TABLE_NAME)
+        .select("account_id, file_name, storage_path, created_at")
+        .eq("account_id", account_id)
+        .order("created_at", desc=True)
+        .execute()
+    )
+    return getattr(response, "data", None) or []
+
+
+def fetch_logos_for_account(client: Client, account_id: str):
+    """Logo rows for an account, cached until the next upload to that account (or the TTL)."""
+    try:
+        version = get_account_versions().get(account_id, 0)
+        return query_logos_for_account(client, account_id, version)
     except Exception as exc:
         st.error(f"Could not load logos: {exc}")
         return []
 
 def render_logo_gallery(client: Client, logos) -> None:
-    for logo in logos:
+    paths = [logo.get("storage_path") for logo in logos if logo.get("storage_path")]
+    images, errors = fetch_thumbnails(client, paths)
+    if errors:
+        st.error(f"Download failed for {len(errors)} logo(s): {next(iter(errors.values()))}")
+
+    columns = st.columns(GALLERY_COLUMNS)
+    for idx, logo in enumerate(logos):
         file_name = logo.get("file_name") or "(unnamed)"
         storage_path = logo.get("storage_path")
-        buffer = download_file(client, storage_path) if storage_path else None
-        if buffer is not None:
-            buffer.seek(0)
-            st.image(buffer, caption=f"{file_name}\n{storage_path}")
-        else:
-            st.write(f"{file_name} ({storage_path}) – unable to display")
+        with columns[idx % GALLERY_COLUMNS]:
+            data = images.get(storage_path) if storage_path else None
+            if data is not None:
+                st.image(io.BytesIO(data), caption=f"{file_name}\n{storage_path}")
+            else:
+                st.write(f"{file_name} ({storage_path}) – unable to display")
 
 def main() -> None:
     st.title("Logo Manager")
@@ -104,28 +497,82 @@ def main() -> None:
         elif uploaded_file is None:
             st.warning("Choose a logo file to upload.")
         else:
-            storage_path = upload_file(client, uploaded_file, account_id)
-            if storage_path:
-                stored = record_logo_entry(
-                    client,
-                    account_id,
-                    uploaded_file.name,
-                    storage_path,
+            digest = content_hash(uploaded_file.getvalue())
+            try:
+                existing = fetch_existing_hashes(client, account_id, [digest])
+            except Exception as exc:
+                st.error(f"Duplicate check failed: {exc}")
+                existing = None
+            if existing is not None and digest in existing:
+                st.info(
+                    f"'{uploaded_file.name}' is already stored for account '{account_id}' ({existing[digest]})."
                 )
-                if stored:
-                    st.success(
-                        f"Stored logo '{uploaded_file.name}' for account '{account_id}'."
+            elif existing is not None:
+                storage_path = upload_file(client, uploaded_file, account_id)
+                if storage_path:
+                    stored = record_logo_entry(
+                        client,
+                        account_id,
+                        uploaded_file.name,
+                        storage_path,
+                        digest,
                     )
+                    if stored:
+                        invalidate_account(account_id)
+                        st.success(
+                            f"Stored logo '{uploaded_file.name}' for account '{account_id}'."
+                        )
+
+    with st.expander("Bulk upload"):
+        with st.form("bulk_upload_form", clear_on_submit=True):
+            bulk_account_id = st.text_input("Account ID", placeholder="e.g. acct_123", key="bulk_account_id")
+            bulk_files = st.file_uploader(
+                "Choose images or zip archives",
+                type=SUPPORTED_TYPES + ["zip"],
+                accept_multiple_files=True,
+            )
+            bulk_submitted = st.form_submit_button("Upload all", type="primary")
+
+        if bulk_submitted:
+            if not bulk_account_id:
+                st.warning("Enter an account ID before uploading.")
+            elif not bulk_files:
+                st.warning("Choose at least one file to upload.")
+            else:
+                files, report = expand_bulk_files(bulk_files)
+                with st.spinner(f"Uploading {len(files)} files..."):
+                    report += bulk_upload_logos(client, bulk_account_id, files)
+                uploaded = sum(1 for row in report if row["status"] == "uploaded")
+                if uploaded:
+                    invalidate_account(bulk_account_id)
+                st.success(f"Uploaded {uploaded} of {len(report)} files for account '{bulk_account_id}'.")
+                st.dataframe(report, width="stretch")
 
     st.divider()
 
     st.subheader("Accounts")
-    accounts = fetch_accounts(client)
-    if not accounts:
+    # Keyset pagination: remember the last account ID of each page we have left.
+    cursors = st.session_state.setdefault("account_cursors", [])
+    after = cursors[-1] if cursors else None
+    accounts = fetch_accounts(client, after)
+    if not accounts and not cursors:
         st.info("No accounts found yet. Upload a logo to get started.")
         return
 
-    selected_account = st.selectbox("Pick an account", accounts)
+    prev_col, next_col = st.columns(2)
+    if cursors and prev_col.button("Previous accounts"):
+        cursors.pop()
+        st.rerun()
+    if len(accounts) == ACCOUNT_PAGE_SIZE and next_col.button("Next accounts"):
+        cursors.append(accounts[-1]["account_id"])
+        st.rerun()
+
+    counts = {row["account_id"]: row.get("logo_count") for row in accounts}
+    selected_account = st.selectbox(
+        "Pick an account",
+        list(counts),
+        format_func=lambda account: f"{account} ({counts[account]} logos)",
+    )
     if not selected_account:
         return
 
@@ -1,21 +1,31 @@
 import streamlit as st
-import os
-os.environ["LANGCHAIN_TRACING_V2"]="true"
-os.environ["LANGCHAIN_API_KEY"]=st.secrets['LANGCHAIN_API_KEY']
-os.environ["LANGCHAIN_PROJECT"]="AIClub Pro"
-os.environ['LANGCHAIN_ENDPOINT']="https://api.smith.langchain.com"
-
-
 
 import random
+import time
+from pathlib import Path
 
 from langchain_core.callbacks import BaseCallbackHandler
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
+from langchain_core.tracers import LangChainTracer
 from langsmith import Client
 
-from graph import salesCompAgent
+from csv_analytics import DatasetStore
+from graph import STREAMING_NODES, get_sales_comp_agent, turn_input
+from conversation_store import ConversationStore
+from history import HistoryWindow
+from langsmith_feedback import FeedbackItem, FeedbackQueue
 
 DEBUGGING=1
+# Tracing goes through one shared client (not process-wide env vars); point
+# LANGCHAIN_ENDPOINT at a local stub to test without the hosted backend.
+LANGSMITH_ENDPOINT = st.secrets.get("LANGCHAIN_ENDPOINT", "https://api.smith.langchain.com")
+LANGSMITH_PROJECT = st.secrets.get("LANGCHAIN_PROJECT", "AIClub Pro")
+LANGSMITH_TRACING = str(st.secrets.get("LANGCHAIN_TRACING_V2", "true")).lower() == "true"
+HISTORY_TOKEN_BUDGET = int(st.secrets.get("HISTORY_TOKEN_BUDGET", 4000))
+CONVERSATION_DB_PATH = st.secrets.get("CONVERSATION_DB_PATH", "conversations.sqlite3")
+MAX_SESSION_DATASETS = int(st.secrets.get("MAX_SESSION_DATASETS", 4))
+CONV_PAGE_SIZE = 20
+# Streaming answers are redrawn at most this many times per second.
+RENDER_FPS = float(st.secrets.get("RENDER_FPS", 12))
 
 PLAN_PROMPT = ("You are an expert writer tasked with writing a high level outline of a short 3 paragraph essay. "
                     "Write such an outline for the user provided topic. Give the three main headers of an outline of "
@@ -44,6 +54,61 @@ RESEARCH_CRITIQUE_ITEM_PROMPT = ("You are a researcher charged with further inve
                                   "Only generate 3 items max.")
 
 
+def escape_markdown(text: str) -> str:
+    """Escape $ so Streamlit does not treat it as LaTeX, without double-escaping."""
+    display_text = text.replace("$", "\\$")
+    return display_text.replace("\\\\$", "\\$")
+
+
+def message_display_text(message: dict) -> str:
+    """Escaped form of a stored message, computed once and kept on the message."""
+    if "display_text" not in message:
+        message["display_text"] = escape_markdown(message["content"])
+    return message["display_text"]
+
+
+class IncrementalMarkdown:
+    """Render a streamed answer by escaping only each new delta.
+
+    Escaped pieces are accumulated and the placeholder is redrawn at most
+    RENDER_FPS times per second; call flush() once the stream ends.
+    """
+
+    def __init__(self, placeholder, fps: float = RENDER_FPS):
+        self.placeholder = placeholder
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.raw_parts = []
+        self.escaped_parts = []
+        self.pending = ""
+        self.last_render = 0.0
+
+    @property
+    def text(self) -> str:
+        return "".join(self.raw_parts)
+
+    def append(self, delta: str) -> None:
+        self.raw_parts.append(delta)
+        chunk = self.pending + delta
+        self.pending = ""
+        if chunk.endswith("\\"):
+            # A trailing backslash may pair with a "$" at the start of the next delta.
+            chunk, self.pending = chunk[:-1], "\\"
+        self.escaped_parts.append(escape_markdown(chunk))
+        now = time.monotonic()
+        if now - self.last_render >= self.interval:
+            self._render()
+            self.last_render = now
+
+    def flush(self) -> None:
+        if self.pending:
+            self.escaped_parts.append(self.pending)
+            self.pending = ""
+        self._render()
+
+    def _render(self) -> None:
+        self.placeholder.markdown("".join(self.escaped_parts))
+
+
 class LangsmithRunRecorder(BaseCallbackHandler):
     def __init__(self):
         self.root_run_id = None
@@ -57,34 +122,76 @@ class LangsmithRunRecorder(BaseCallbackHandler):
             self.root_run_id = str(run_id)
 
 
+@st.cache_resource(show_spinner=False)
+def get_langsmith_client() -> Client:
+    """One LangSmith client per process; it batches trace uploads in the background."""
+    return Client(
+        api_url=LANGSMITH_ENDPOINT,
+        api_key=st.secrets.get('LANGCHAIN_API_KEY'),
+        auto_batch_tracing=True,
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_feedback_queue() -> FeedbackQueue:
+    client = get_langsmith_client()
+    return FeedbackQueue(client_factory=lambda: client)
+
+
+def get_tracing_callbacks() -> list:
+    if not LANGSMITH_TRACING:
+        return []
+    return [LangChainTracer(project_name=LANGSMITH_PROJECT, client=get_langsmith_client())]
+
+
 def record_langsmith_feedback(feedback_label: str) -> None:
     run_id = st.session_state.get("last_langsmith_run_id")
     if not run_id:
         print("No LangSmith run id available for feedback; skipping logging.")
         return
 
-    try:
-        client = Client()
-    except Exception as exc:
-        print(f"Unable to initialize LangSmith client: {exc}")
-        return
-
     score = 1 if feedback_label == "positive" else 0
     source_info = {"source": "streamlit_feedback"}
     thread_id = st.session_state.get("thread_id")
     if thread_id:
         source_info["thread_id"] = thread_id
 
-    try:
-        client.create_feedback(
+    # Queued for the background sender; the click returns immediately.
+    queued = get_feedback_queue().submit(
+        FeedbackItem(
             run_id=run_id,
             key="user_feedback",
             score=score,
             value=feedback_label,
             source_info=source_info,
         )
+    )
+    if not queued:
+        print("LangSmith feedback queue is full; dropping feedback.")
+
+
+@st.cache_resource(show_spinner=False)
+def get_conversation_store() -> ConversationStore:
+    return ConversationStore(CONVERSATION_DB_PATH)
+
+
+def save_conv_history_to_db(thread_id) -> None:
+    user_record = st.session_state.get('user_record')
+    if not user_record:
+        return
+    try:
+        get_conversation_store().save_messages(thread_id, user_record.get('id', 0), st.session_state.messages)
     except Exception as exc:
-        print(f"Failed to log LangSmith feedback: {exc}")
+        print(f"Failed to save conversation {thread_id}: {exc}")
+
+
+def restore_conv_history_to_ui(conv_id) -> None:
+    """Open a stored conversation; its messages are only read at this point."""
+    st.session_state.messages = get_conversation_store().load_messages(conv_id)
+    st.session_state.thread_id = conv_id
+    st.session_state.pop("history_window", None)
+    st.session_state.pop("csv_data", None)
+    st.rerun()
 
 
 def initialize_prompts():
@@ -146,13 +253,19 @@ def start_chat(container=st):
         st.session_state.thread_id = random.randint(1000, 100000000)
     thread_id = st.session_state.thread_id
 
+    # Parsed CSV uploads are per session, so other users' uploads can't evict them.
+    if "datasets" not in st.session_state:
+        st.session_state.datasets = DatasetStore(max_datasets=MAX_SESSION_DATASETS)
+
 
     user_record = st.session_state.get('user_record')
 
     if user_record:
         user_id = user_record.get('id', 0)
         #st.write(f"{user_id=}")
-        conv_history = None
+        # Titles only, one page at a time; bodies load when a conversation is opened.
+        cursor = st.session_state.get("conv_page_cursor")
+        conv_history = get_conversation_store().list_conversations(user_id, limit=CONV_PAGE_SIZE, before=cursor)
 
         if conv_history:
             for idx, conv in enumerate(conv_history):
@@ -162,23 +275,39 @@ def start_chat(container=st):
                 conv_key = conv_name + f"{idx}"
 
                 if st.sidebar.button(conv_name, type="tertiary", key=conv_key):
-                    #st.error("to do")
-                    r = conv['conv']
-                    #restore_conv_history_to_ui(conv_id, r)
+                    restore_conv_history_to_ui(conv_id)
+
+            if len(conv_history) == CONV_PAGE_SIZE and st.sidebar.button("Older conversations", key="conv_older"):
+                st.session_state.conv_page_cursor = conv_history[-1]
+                st.rerun()
+        if cursor and st.sidebar.button("Newest conversations", key="conv_newest"):
+            st.session_state.conv_page_cursor = None
+            st.rerun()
 
 
     for message in st.session_state.messages:
         if message["role"] != "system":
             with st.chat_message(message["role"]):
-                display_text = message["content"].replace("$", "\\$")
-                display_text = display_text.replace("\\\\$", "\\$")
-                st.markdown(display_text)
+                st.markdown(message_display_text(message))
                 #st.markdown(message["content"].replace("$", "\\$")) 
     
     if prompt := st.chat_input("Ask me anything related to sales comp..", accept_file=True, file_type=["pdf", "md", "doc", "csv"]):
+        app = get_sales_comp_agent(st.secrets['OPENAI_API_KEY'], st.secrets['EMBEDDING_MODEL'])
+
         if prompt and prompt["files"]:
             uploaded_file=prompt["files"][0]
-            file_contents, filetype = "XXX XXX XXX TO-DO", "csv"
+            filetype = Path(uploaded_file.name).suffix.lstrip(".").lower()
+            if filetype == 'csv':
+                # Parsed once into a typed DataFrame; only its key travels in state.
+                try:
+                    file_contents = st.session_state.datasets.add(uploaded_file.getvalue(), uploaded_file.name)
+                except Exception as exc:  # Malformed CSV: keep chatting without it
+                    st.error(f"Could not read {uploaded_file.name}: {exc}")
+                    file_contents = None
+            elif filetype == 'md':
+                file_contents = uploaded_file.getvalue().decode("utf-8", errors="ignore")
+            else:
+                file_contents = f"({uploaded_file.name} was attached but only text and CSV files can be read)"
             if filetype != 'csv':
                 prompt.text = prompt.text + f"\n Here are the file contents: {file_contents}"
         
@@ -188,81 +317,87 @@ def start_chat(container=st):
         with st.chat_message("user"):
             st.write(user_prompt.replace("$", "\\$"))
 
-        message_history = []
-        msgs = st.session_state.messages
-    
-    # Iterate through chat history, and based on the role (user or assistant) tag it as HumanMessage or AIMessage
-        for m in msgs:
-            if m["role"] == "user":
-                message_history.append(HumanMessage(content=m["content"]))
-            elif m["role"] == "assistant":
-                message_history.append(AIMessage(content=m["content"]))
-        
-        app = salesCompAgent(st.secrets['OPENAI_API_KEY'], st.secrets['EMBEDDING_MODEL'])
+        # Only the newest turns are token-counted; older ones live in a rolling summary.
+        if "history_window" not in st.session_state:
+            st.session_state.history_window = HistoryWindow(HISTORY_TOKEN_BUDGET, app.summarize_history)
+        message_history = st.session_state.history_window.build(st.session_state.messages)
         #app = ewriter_langgraph()
         
         
         thread={"configurable":{"thread_id":thread_id}}
         run_recorder = LangsmithRunRecorder()
-        config={"configurable":{"thread_id":thread_id},
+        config={"configurable":{"thread_id":thread_id,
+                                "datasets": st.session_state.datasets},
                 "tags": ["production", "sentiment-analysis", "v1.0"],
                     "metadata": {
                     "user_id": "user_123",
                     "session_id": "session_456",
                     "environment": "production"
                     },
-                "callbacks": [run_recorder]
+                "callbacks": [run_recorder, *get_tracing_callbacks()]
             }
-        parameters = {'initialMessage': prompt.text, 
-                      #'sessionState': st.session_state, 
-                        #'sessionHistory': st.session_state.messages, 
-                        'message_history': message_history}
-        
-        if 'csv_data' in st.session_state:
-            parameters['csv_data'] = st.session_state['csv_data']
-        
-        if prompt['files'] and filetype == 'csv':
-            parameters['csv_data'] = file_contents
+        if prompt['files'] and filetype == 'csv' and file_contents:
             st.session_state['csv_data'] = file_contents
+        # csv_data is always passed (None without a CSV) so a restored thread's checkpoint can't supply one.
+        parameters = turn_input(prompt.text, message_history, st.session_state.get('csv_data'))
 
+        st.session_state["last_node_timings"] = {}
         with st.spinner("Thinking ...", show_time=True):
             full_response = ""
-            
-
+            stream_renderer = None
 
-
-
-            for s in app.graph.stream(parameters, config):
+            for mode, s in app.graph.stream(parameters, config, stream_mode=["messages", "updates"]):
                 if run_recorder.root_run_id and st.session_state.get("last_langsmith_run_id") != run_recorder.root_run_id:
                     st.session_state["last_langsmith_run_id"] = run_recorder.root_run_id
+
+                if mode == "messages":
+                    chunk, metadata = s
+                    if metadata.get("langgraph_node") in STREAMING_NODES and chunk.content:
+                        if stream_renderer is None:
+                            with st.chat_message("assistant"):
+                                stream_renderer = IncrementalMarkdown(st.empty())
+                        stream_renderer.append(chunk.content)
+                    continue
+
                 if DEBUGGING:
                     print(f"GRAPH RUN: {s}")
                 for k,v in s.items():
                     if DEBUGGING:
                         print(f"Key: {k}, Value: {v}")
                 
+                if category := v.get("category"):
+                    st.session_state["last_category"] = category
+                if timings := v.get("node_timings"):
+                    st.session_state.setdefault("last_node_timings", {}).update(timings)
+
                 if resp := v.get("responseToUser"):
+                    if stream_renderer is not None:
+                        # Already rendered token by token; draw the final frame and record it.
+                        stream_renderer.flush()
+                        st.session_state.messages.append({"role": "assistant", "content": stream_renderer.text or resp})
+                        accept_feedback()
+                        save_conv_history_to_db(thread_id)
+                        continue
                     with st.chat_message("assistant"):
                         # Clean up response: remove weird line breaks
-                        cleaned_resp = resp.replace('\n', ' ').replace('  ', ' ')
+                        # Cached answers come from the streaming path and are already clean markdown.
+                        cleaned_resp = resp if v.get("cached") else resp.replace('\n', ' ').replace('  ', ' ')
                         st.markdown(cleaned_resp, unsafe_allow_html=True)
                         st.session_state.messages.append({"role": "assistant", "content": cleaned_resp})
                         accept_feedback()
-                        #save_conv_history_to_db(thread_id)
+                        save_conv_history_to_db(thread_id)
                 
                 if resp := v.get("incrementalResponse"):
                     with st.chat_message("assistant"):
-                        placeholder = st.empty()
+                        renderer = IncrementalMarkdown(st.empty())
                         for response in resp:
-                            full_response = full_response + response.content
-                            display_text = full_response.replace("$", "\\$")
-                            display_text = display_text.replace("\\\$", "\\$")
-                            placeholder.markdown(display_text)
-                            #placeholder.markdown(full_response.replace("$", "\\$"))
+                            renderer.append(response.content)
+                        renderer.flush()
+                        full_response = renderer.text
                     st.session_state.messages.append({"role": "assistant", "content": full_response})
                     accept_feedback()
                     
-                    #save_conv_history_to_db(thread_id)
+                    save_conv_history_to_db(thread_id)
 
             if run_recorder.root_run_id:
                 st.session_state["last_langsmith_run_id"] = run_recorder.root_run_id
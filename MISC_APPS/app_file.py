@@ -3,9 +3,11 @@
 from __future__ import annotations
 
 import os
+import queue
 import sqlite3
+import threading
 from pathlib import Path
-from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 import pandas as pd
 import streamlit as st
@@ -14,6 +16,15 @@ import tiktoken
 DEFAULT_DB_PATH = Path(st.secrets.get("TOKEN_DB_PATH", "token_counts.sqlite3"))
 ENCODING_NAME = st.secrets.get("TOKEN_ENCODING", "cl100k_base")
 MAX_READ_BYTES = int(st.secrets.get("TOKEN_MAX_READ_BYTES", 5_000_000))
+WATCH_POLL_SECONDS = float(st.secrets.get("TOKEN_WATCH_POLL_SECONDS", 2.0))
+WATCH_REFRESH_SECONDS = float(st.secrets.get("TOKEN_WATCH_REFRESH_SECONDS", 3.0))
+
+try:  # Optional: inotify-backed events via watchdog, polling otherwise.
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # pragma: no cover - depends on the environment
+    FileSystemEventHandler = object
+    Observer = None
 
 
 @st.cache_resource(show_spinner=False)
@@ -55,6 +66,10 @@ def init_db(conn: sqlite3.Connection) -> None:
             ON file_tokens(root_path);
         CREATE INDEX IF NOT EXISTS idx_dir_tokens_root_path
             ON dir_tokens(root_path);
+        CREATE INDEX IF NOT EXISTS idx_file_tokens_root_file
+            ON file_tokens(root_path, path);
+        CREATE INDEX IF NOT EXISTS idx_dir_tokens_root_dir
+            ON dir_tokens(root_path, path);
         """
     )
     conn.commit()
@@ -192,6 +207,13 @@ def store_results(
         )
 
 
+def has_results(conn: sqlite3.Connection, root: Path) -> bool:
+    """True once the root has been analysed and stored."""
+    return conn.execute(
+        "SELECT 1 FROM dir_tokens WHERE root_path = ? LIMIT 1", (str(root),)
+    ).fetchone() is not None
+
+
 def fetch_results(
     conn: sqlite3.Connection, root: Path
 ) -> Tuple[pd.DataFrame, pd.DataFrame, Optional[int]]:
@@ -229,6 +251,318 @@ def fetch_results(
     return files_df, dirs_df, root_total
 
 
+def is_excluded(path: Path, root: Path, excluded_dirs: Iterable[Path]) -> bool:
+    """Return True when path lies outside root or inside an excluded directory."""
+    if path != root and root not in path.parents:
+        return True
+    return any(path == d or d in path.parents for d in excluded_dirs)
+
+
+def ancestor_dirs(directory: Path, root: Path) -> List[Path]:
+    """Return directory and each of its parents up to and including root."""
+    ancestors = [directory]
+    while directory != root:
+        directory = directory.parent
+        ancestors.append(directory)
+    return ancestors
+
+
+def apply_token_delta(
+    conn: sqlite3.Connection, root: Path, directory: Path, delta: int
+) -> None:
+    """Add delta to directory and every ancestor row in dir_tokens."""
+    if not delta:
+        return
+    root_str = str(root)
+    for ancestor in ancestor_dirs(directory, root):
+        updated = conn.execute(
+            """
+            UPDATE dir_tokens
+            SET tokens = tokens + ?, computed_at = CURRENT_TIMESTAMP
+            WHERE root_path = ? AND path = ?
+            """,
+            (delta, root_str, str(ancestor)),
+        ).rowcount
+        if not updated:
+            parent = str(ancestor.parent) if ancestor != root else None
+            conn.execute(
+                "INSERT INTO dir_tokens (root_path, path, parent_path, tokens) VALUES (?, ?, ?, ?)",
+                (root_str, str(ancestor), parent, delta),
+            )
+
+
+def remove_file_record(conn: sqlite3.Connection, root: Path, path: Path) -> int:
+    """Drop a stored file row and subtract its tokens from its ancestors."""
+    row = conn.execute(
+        "SELECT tokens FROM file_tokens WHERE root_path = ? AND path = ?",
+        (str(root), str(path)),
+    ).fetchone()
+    if row is None:
+        return 0
+    conn.execute(
+        "DELETE FROM file_tokens WHERE root_path = ? AND path = ?",
+        (str(root), str(path)),
+    )
+    apply_token_delta(conn, root, path.parent, -row["tokens"])
+    return -row["tokens"]
+
+
+def update_file_record(
+    conn: sqlite3.Connection,
+    root: Path,
+    path: Path,
+    encoder,
+    excluded_dirs: Iterable[Path] = (),
+) -> int:
+    """Recount a single changed path and propagate the delta to dir_tokens.
+
+    Handles created, modified and deleted files as well as removed or newly
+    added directories. Returns the net token change applied to the root.
+    """
+    root = root.resolve()
+    path = Path(os.path.abspath(path))
+    if is_excluded(path, root, excluded_dirs):
+        return 0
+
+    with conn:
+        if path.is_dir():
+            delta = 0
+            for current_root, dir_names, files in os.walk(path):
+                current_path = Path(current_root)
+                dir_names[:] = [
+                    name
+                    for name in dir_names
+                    if not is_excluded(current_path / name, root, excluded_dirs)
+                ]
+                for file_name in files:
+                    delta += _recount_file(conn, root, current_path / file_name, encoder)
+            return delta
+
+        if not path.exists():
+            delta = remove_file_record(conn, root, path)
+            if delta:
+                return delta
+            # A removed directory: drop every stored file beneath it.
+            prefix = str(path) + os.sep
+            rows = conn.execute(
+                "SELECT path FROM file_tokens WHERE root_path = ? AND substr(path, 1, ?) = ?",
+                (str(root), len(prefix), prefix),
+            ).fetchall()
+            for row in rows:
+                delta += remove_file_record(conn, root, Path(row["path"]))
+            conn.execute(
+                "DELETE FROM dir_tokens WHERE root_path = ? AND (path = ? OR substr(path, 1, ?) = ?)",
+                (str(root), str(path), len(prefix), prefix),
+            )
+            return delta
+
+        return _recount_file(conn, root, path, encoder)
+
+
+def _recount_file(conn: sqlite3.Connection, root: Path, path: Path, encoder) -> int:
+    """Replace the stored count for one file; caller owns the transaction."""
+    tokens, error = count_tokens_in_file(path, encoder)
+    if error or tokens is None:
+        return remove_file_record(conn, root, path)
+
+    row = conn.execute(
+        "SELECT tokens FROM file_tokens WHERE root_path = ? AND path = ?",
+        (str(root), str(path)),
+    ).fetchone()
+    if row is None:
+        conn.execute(
+            "INSERT INTO file_tokens (root_path, path, parent_path, tokens) VALUES (?, ?, ?, ?)",
+            (str(root), str(path), str(path.parent), tokens),
+        )
+        delta = tokens
+    else:
+        delta = tokens - row["tokens"]
+        conn.execute(
+            """
+            UPDATE file_tokens
+            SET tokens = ?, computed_at = CURRENT_TIMESTAMP
+            WHERE root_path = ? AND path = ?
+            """,
+            (tokens, str(root), str(path)),
+        )
+    apply_token_delta(conn, root, path.parent, delta)
+    return delta
+
+
+def snapshot_tree(root: Path, excluded_dirs: Iterable[Path]) -> Dict[str, Tuple[int, int]]:
+    """Map every file under root to its (mtime_ns, size) for polling."""
+    excluded_set = {Path(p).resolve() for p in excluded_dirs}
+    snapshot: Dict[str, Tuple[int, int]] = {}
+    for current_root, dir_names, files in os.walk(root):
+        current_path = Path(current_root)
+        dir_names[:] = [
+            name for name in dir_names if (current_path / name).resolve() not in excluded_set
+        ]
+        for file_name in files:
+            file_path = current_path / file_name
+            try:
+                stat = file_path.stat()
+            except OSError:
+                continue
+            snapshot[str(file_path)] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def diff_snapshots(
+    before: Dict[str, Tuple[int, int]], after: Dict[str, Tuple[int, int]]
+) -> Set[str]:
+    """Return paths that were created, modified or deleted between snapshots."""
+    changed = {path for path, sig in after.items() if before.get(path) != sig}
+    changed.update(path for path in before if path not in after)
+    return changed
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    """Forward watchdog events to the watcher's pending-change queue."""
+
+    def __init__(self, changes: "queue.Queue[str]") -> None:
+        super().__init__()
+        self.changes = changes
+
+    def on_any_event(self, event) -> None:
+        event_type = getattr(event, "event_type", "")
+        if event_type in {"opened", "closed_no_write"}:
+            return
+        # Directory mtime bumps accompany every child change; the child event suffices.
+        if event.is_directory and event_type == "modified":
+            return
+        self.changes.put(event.src_path)
+        dest = getattr(event, "dest_path", "")
+        if dest:
+            self.changes.put(dest)
+
+
+class TokenTreeWatcher:
+    """Keep stored token totals for a root directory current as files change.
+
+    Uses watchdog (inotify on Linux) when installed and falls back to polling
+    mtimes. Changes are applied incrementally with update_file_record, using a
+    dedicated SQLite connection owned by the background thread. ``write_lock``
+    is held while applying them so a full re-scan of the same root
+    (store_results) never interleaves with the deltas.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        root: Path,
+        excluded_dirs: Iterable[Path] = (),
+        poll_interval: float = WATCH_POLL_SECONDS,
+        encoder=None,
+        write_lock: Optional[threading.Lock] = None,
+    ) -> None:
+        self.db_path = db_path
+        self.root = root.resolve()
+        self.excluded_dirs = [Path(p).resolve() for p in excluded_dirs]
+        self.poll_interval = poll_interval
+        self.encoder = encoder
+        self.write_lock = write_lock or threading.Lock()
+        self.changes: "queue.Queue[str]" = queue.Queue()
+        self.updates_applied = 0
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._observer is not None else "polling"
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "TokenTreeWatcher":
+        if self.running:
+            return self
+        self._stop.clear()
+        if Observer is not None:
+            try:
+                observer = Observer()
+                observer.schedule(_ChangeHandler(self.changes), str(self.root), recursive=True)
+                observer.start()
+                self._observer = observer
+            except Exception as exc:  # e.g. inotify watch limit reached
+                self.last_error = f"Falling back to polling: {exc}"
+                self._observer = None
+        self._thread = threading.Thread(target=self._run, name="token-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        encoder = self.encoder or tiktoken.get_encoding(ENCODING_NAME)
+        snapshot = None if self._observer is not None else snapshot_tree(self.root, self.excluded_dirs)
+        try:
+            while not self._stop.wait(self.poll_interval):
+                if snapshot is not None:
+                    current = snapshot_tree(self.root, self.excluded_dirs)
+                    for path in diff_snapshots(snapshot, current):
+                        self.changes.put(path)
+                    snapshot = current
+                self.process_pending(conn, encoder)
+        finally:
+            conn.close()
+
+    def process_pending(self, conn: sqlite3.Connection, encoder) -> int:
+        """Drain queued paths (deduplicated) and apply their token deltas."""
+        pending: Set[str] = set()
+        while True:
+            try:
+                pending.add(self.changes.get_nowait())
+            except queue.Empty:
+                break
+        with self.write_lock:
+            for raw_path in sorted(pending):
+                try:
+                    update_file_record(conn, self.root, Path(raw_path), encoder, self.excluded_dirs)
+                    self.updates_applied += 1
+                except Exception as exc:  # Keep watching even if one path fails
+                    self.last_error = f"Could not update {raw_path}: {exc}"
+        return len(pending)
+
+
+@st.cache_resource(show_spinner=False)
+def get_root_lock(db_path: str, root_path: str) -> threading.Lock:
+    """Process-wide lock serialising writes to one root's stored totals."""
+    return threading.Lock()
+
+
+@st.cache_resource(show_spinner=False, scope="session", max_entries=1, on_release=TokenTreeWatcher.stop)
+def get_session_watcher(db_path: str, root_path: str, excluded: Tuple[str, ...]) -> TokenTreeWatcher:
+    """This session's watcher; Streamlit stops it on a key change or when the session disconnects."""
+    return TokenTreeWatcher(
+        db_path, Path(root_path), [Path(p) for p in excluded], write_lock=get_root_lock(db_path, root_path)
+    ).start()
+
+
+def sync_watcher(db_path: str, root_path: str, excluded: Tuple[str, ...], enabled: bool) -> Optional[TokenTreeWatcher]:
+    """Keep at most one watcher per session, restarting it when its key changes."""
+    if enabled:
+        st.session_state.token_watcher_key = (db_path, root_path, excluded)
+        return get_session_watcher(db_path, root_path, excluded)
+    key = st.session_state.pop("token_watcher_key", None)
+    if key is not None:
+        get_session_watcher.clear(*key)
+    return None
+
+
 def format_relative_columns(df: pd.DataFrame, root: Path) -> pd.DataFrame:
     """Add relative path information for display."""
     if df.empty or "path" not in df.columns:
@@ -298,6 +632,11 @@ def main() -> None:
             value=default_exclude,
             help="These directories will be skipped during traversal.",
         )
+        watch = st.checkbox(
+            "Watch for changes",
+            value=False,
+            help="Keep stored totals current by applying per-file deltas as files change.",
+        )
 
     analyze = st.button("Analyse directory", type="primary")
 
@@ -331,7 +670,8 @@ def main() -> None:
                         root_path, encoder, excluded, report
                     )
                     progress_bar.progress(1.0)
-                    store_results(conn, root_path.resolve(), file_records, dir_records)
+                    with get_root_lock(str(Path(db_path).resolve()), str(root_path.resolve())):
+                        store_results(conn, root_path.resolve(), file_records, dir_records)
                     progress_placeholder.success(
                         f"Scan complete: {len(file_records):,} files |"
                         f" {sum(rec['tokens'] for rec in file_records):,} tokens"
@@ -353,8 +693,31 @@ def main() -> None:
                     st.error(f"Analysis failed: {exc}")
 
     if not root_path.exists():
+        sync_watcher("", "", (), enabled=False)
         return
 
+    can_watch = watch and root_path.is_dir() and has_results(conn, root_path.resolve())
+    if watch and not can_watch:
+        st.warning("Analyse this directory before watching it for changes.")
+    watcher = sync_watcher(
+        str(Path(db_path).resolve()),
+        str(root_path.resolve()),
+        tuple(sorted(str(p) for p in parse_exclusions(excludes_input, root_path))),
+        enabled=can_watch,
+    )
+    if watcher is not None:
+        st.caption(
+            f"Watching {watcher.root} ({watcher.mode}) | {watcher.updates_applied:,} updates applied"
+        )
+        if watcher.last_error:
+            st.caption(watcher.last_error)
+        st.fragment(run_every=WATCH_REFRESH_SECONDS)(render_results)(conn, root_path)
+    else:
+        render_results(conn, root_path)
+
+
+def render_results(conn: sqlite3.Connection, root_path: Path) -> None:
+    """Show the stored summary and tables for root_path."""
     files_df, dirs_df, root_total = fetch_results(conn, root_path.resolve())
     if files_df.empty and dirs_df.empty:
         st.info("No stored results for this directory yet. Click 'Analyse directory' to begin.")
@@ -1,18 +1,23 @@
-import streamlit as st
-from apify_client import ApifyClient
-import pandas as pd
+import asyncio
 import re
 import time
 
-# --- CONFIGURATION ---
-APIFY_API_TOKEN = st.secrets["APIFY_API_TOKEN"]
-client = ApifyClient(APIFY_API_TOKEN)
-
 import streamlit as st
 import pandas as pd
-import time
-import re
-from apify_client import ApifyClient
+from apify_client import ApifyClientAsync
+
+from linkedin_fetch import comment_source, fetch_pages, reaction_source
+from scrape_cache import ScrapeCache, utc_now
+from scrape_export import EXPORT_FORMATS, export_file
+
+# --- CONFIGURATION ---
+APIFY_API_TOKEN = st.secrets["APIFY_API_TOKEN"]
+APIFY_API_URL = st.secrets.get("APIFY_API_URL", "https://api.apify.com")
+MAX_CONCURRENT_RUNS = int(st.secrets.get("APIFY_MAX_CONCURRENT_RUNS", 6))
+SCRAPE_CACHE_PATH = st.secrets.get("SCRAPE_CACHE_PATH", "linkedin_scrape_cache.sqlite3")
+TABLE_REFRESH_SECONDS = 0.5
+PREVIEW_ROWS = 200
+EXPORT_COLUMNS = ["Type", "Reaction Type", "Name", "Headline", "Profile URL", "Comment"]
 
 # ===========================================
 # CONFIG
@@ -27,6 +32,12 @@ using Apify’s LinkedIn scrapers — no cookies or login required.
 """)
 
 post_url = st.text_input("🔗 Paste LinkedIn Post URL (e.g., https://www.linkedin.com/feed/update/urn:li:activity:1234567890123456789)")
+incremental = st.checkbox(
+    "♻️ Incremental: reuse cached results and only fetch pages after the last run",
+    value=True,
+    help="Untick for a full re-scrape; items that no longer appear are then dropped from the cache."
+)
+export_format = st.radio("📁 Export format", list(EXPORT_FORMATS), horizontal=True)
 
 # ===========================================
 # HELPERS
@@ -37,48 +48,62 @@ def extract_post_id(linkedin_url):
     match = re.search(r"(?:activity-|activity:)(\d+)", linkedin_url)
     return match.group(1) if match else None
 
-def get_reactions(client, post_url):
-    """Fetch all reactions"""
-    all_reactions = []
-    page = 1
-    while True:
-        run = client.actor("apimaestro/linkedin-post-reactions").call(run_input={
-            "post_url": post_url,
-            "page_number": page,
-            "reaction_type": "ALL",
-            "limit": 100
-        })
-        items = list(client.dataset(run["defaultDatasetId"]).iterate_items())
-        if not items:
-            break
-        all_reactions.extend(items)
-        st.write(f"✅ Reactions page {page}: {len(items)} items")
-        if len(items) < 100:
-            break
-        page += 1
-        time.sleep(2)
-    return all_reactions
-
-def get_comments(client, post_id):
-    """Fetch all comments & replies"""
-    all_comments = []
-    page = 1
-    while True:
-        run = client.actor("apimaestro/linkedin-post-comments-replies-engagements-scraper-no-cookies").call(run_input={
-            "postIds": [post_id],
-            "page_number": page,
-            "limit": 100
-        })
-        items = list(client.dataset(run["defaultDatasetId"]).iterate_items())
-        if not items:
-            break
-        all_comments.extend(items)
-        st.write(f"✅ Comments page {page}: {len(items)} items")
-        if len(items) < 100:
-            break
-        page += 1
-        time.sleep(2)
-    return all_comments
+def reaction_row(r):
+    return {
+        "Type": "Reaction",
+        "Reaction Type": r.get("reaction_type"),
+        "Name": r.get("reactor", {}).get("name"),
+        "Headline": r.get("reactor", {}).get("headline"),
+        "Profile URL": r.get("reactor", {}).get("profile_url"),
+        "Comment": None
+    }
+
+def comment_row(c):
+    return {
+        "Type": "Comment",
+        "Reaction Type": None,
+        "Name": c.get("commenter", {}).get("name"),
+        "Headline": c.get("commenter", {}).get("headline"),
+        "Profile URL": c.get("commenter", {}).get("profile_url"),
+        "Comment": c.get("comment_text"),
+    }
+
+ROW_BUILDERS = {"reaction": reaction_row, "comment": comment_row}
+
+@st.cache_resource(show_spinner=False)
+def get_scrape_cache():
+    return ScrapeCache(SCRAPE_CACHE_PATH)
+
+def preview_rows(cache, post_id):
+    """First PREVIEW_ROWS rows from the cache: reactions then comments, each in page order."""
+    return [ROW_BUILDERS[kind](item) for kind, item in cache.load_items(post_id, PREVIEW_ROWS)]
+
+def export_bytes(cache, post_id, fmt):
+    """Stream the cached rows through a spooled file; only the finished file is read into memory."""
+    batches = (
+        [ROW_BUILDERS[kind](item) for kind, item in batch]
+        for batch in cache.iter_item_batches(post_id)
+    )
+    with export_file(batches, EXPORT_COLUMNS, fmt) as exported:
+        return exported.read()
+
+async def scrape(post_url, post_id, cache, incremental, log, table):
+    """Fetch reactions and comments concurrently into the cache, refreshing the table as pages arrive."""
+    client = ApifyClientAsync(APIFY_API_TOKEN, api_url=APIFY_API_URL, max_retries=1)
+    started_at = utc_now()
+    first_pages = cache.resume_pages(post_id) if incremental else None
+    last_refresh = 0.0
+    sources = [reaction_source(post_url), comment_source(post_id)]
+    # Incremental runs usually find at most one changed page, so don't pay for speculative runs.
+    prefetch = 1 if incremental else 3
+    async for page in fetch_pages(client, sources, first_pages, max_in_flight=MAX_CONCURRENT_RUNS, prefetch=prefetch):
+        added = cache.save_page(post_id, page.kind, page.number, page.items)
+        log.write(f"✅ {page.kind.title()}s page {page.number}: {len(page.items)} items ({added} new)")
+        if time.monotonic() - last_refresh >= TABLE_REFRESH_SECONDS:
+            table.dataframe(pd.DataFrame(preview_rows(cache, post_id), columns=EXPORT_COLUMNS))
+            last_refresh = time.monotonic()
+    if not incremental:
+        cache.prune(post_id, started_at)
 
 # ===========================================
 # MAIN APP
@@ -89,59 +114,47 @@ if st.button("🚀 Run Scraper"):
     elif not post_url:
         st.error("Please provide a LinkedIn post URL.")
     else:
-        client = ApifyClient(APIFY_API_TOKEN)
         post_id = extract_post_id(post_url)
 
         if not post_id:
             st.error("❌ Could not extract post ID. Please make sure your URL contains 'activity-<numbers>' or 'activity:<numbers>'.")
         else:
-            st.info(f"Scraping data for post ID `{post_id}` … this may take a few minutes ⏳")
-
-            # Fetch reactions
-            with st.spinner("Fetching reactions..."):
-                reactions = get_reactions(client, post_url)
-            st.success(f"🎉 Retrieved {len(reactions)} reactions")
-
-            # Fetch comments
-            with st.spinner("Fetching comments..."):
-                comments = get_comments(client, post_id)
-            st.success(f"💬 Retrieved {len(comments)} comments")
-
-            # Convert to DataFrames
-            df_reactions = pd.DataFrame([
-                {
-                    "Type": "Reaction",
-                    "Reaction Type": r.get("reaction_type"),
-                    "Name": r.get("reactor", {}).get("name"),
-                    "Headline": r.get("reactor", {}).get("headline"),
-                    "Profile URL": r.get("reactor", {}).get("profile_url"),
-                    "Comment": None
-                }
-                for r in reactions
-            ])
-
-            df_comments = pd.DataFrame([
-                {
-                    "Type": "Comment",
-                    "Reaction Type": None,
-                    "Name": c.get("commenter", {}).get("name"),
-                    "Headline": c.get("commenter", {}).get("headline"),
-                    "Profile URL": c.get("commenter", {}).get("profile_url"),
-                    "Comment": c.get("comment_text"),
-                }
-                for c in comments
-            ])
-
-            combined_df = pd.concat([df_reactions, df_comments], ignore_index=True)
-
+            cache = get_scrape_cache()
+            last_fetched = cache.last_fetched(post_id)
+            if incremental and last_fetched:
+                st.info(f"Updating cached data for post ID `{post_id}` (last fetched {last_fetched[:16].replace('T', ' ')} UTC) ⏳")
+            else:
+                st.info(f"Scraping data for post ID `{post_id}` … this may take a few minutes ⏳")
+
+            log = st.status("Fetching reactions and comments...")
             st.subheader("📊 Combined Data Preview")
-            st.dataframe(combined_df)
-
+            table = st.empty()
+            if incremental:
+                table.dataframe(pd.DataFrame(preview_rows(cache, post_id), columns=EXPORT_COLUMNS))
+            try:
+                asyncio.run(scrape(post_url, post_id, cache, incremental, log, table))
+            except Exception as exc:
+                log.update(label="Scraping failed", state="error")
+                st.error(f"❌ Scraping failed: {exc}")
+                st.stop()
+            counts = cache.counts(post_id)
+            log.update(label=f"Have {counts['reaction']} reactions and {counts['comment']} comments", state="complete")
+            st.success(f"🎉 Retrieved {counts['reaction']} reactions")
+            st.success(f"💬 Retrieved {counts['comment']} comments")
+
+            table.dataframe(pd.DataFrame(preview_rows(cache, post_id), columns=EXPORT_COLUMNS))
+            total = counts["reaction"] + counts["comment"]
+            if total > PREVIEW_ROWS:
+                st.caption(f"Showing the first {PREVIEW_ROWS} of {total} rows; the download has them all.")
+
+            extension, mime = EXPORT_FORMATS[export_format]
             st.download_button(
-                label="📥 Download Combined CSV",
-                data=combined_df.to_csv(index=False).encode("utf-8"),
-                file_name=f"linkedin_post_data_{post_id}.csv",
-                mime="text/csv"
+                label=f"📥 Download Combined {export_format}",
+                # Built on click from the cache, so no copy of the export sits in the session.
+                data=lambda: export_bytes(cache, post_id, export_format),
+                file_name=f"linkedin_post_data_{post_id}.{extension}",
+                mime=mime,
+                on_click="ignore"
             )
 
             st.success("✅ Done! You can download the combined data above.")
@@ -1,109 +1,314 @@
+import argparse
+import os
+
 import numpy as np
-import matplotlib.pyplot as plt
+import matplotlib
 
 from sklearn.datasets import make_blobs
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import SGDClassifier
-from sklearn.metrics import accuracy_score, confusion_matrix, ConfusionMatrixDisplay
+from sklearn.metrics import accuracy_score, confusion_matrix
+from matplotlib.lines import Line2D
+
+from lr_stream import (
+    DEFAULT_BATCH_SIZE, HOLDOUT_POINTS, PLOT_SAMPLE, blob_centers, boundary_segment,
+    density_image, generated_batches, holdout_size, load_memmap, memmap_batches, plot_extent,
+    sample_blobs, sample_rows, stream_training, write_blobs_npy,
+)
+from lr_sweep import SCHEDULES, best_configs, plot_sweep, run_sweep, sweep_grid
+
+EPOCHS = 40
+FRAME_INTERVAL_MS = 350
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Animate SGD logistic regression on two blobs.")
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--interval", type=int, default=FRAME_INTERVAL_MS, help="Milliseconds per frame on screen")
+    parser.add_argument("--save", help="Write the animation to this .mp4 or .gif (sweep: an image) instead of opening a window")
+    parser.add_argument("--fps", type=int, default=5, help="Frame rate of the saved file")
+    parser.add_argument("--dpi", type=int, default=100)
+    large = parser.add_argument_group("large-scale mode (mini-batch streaming, density plot)")
+    large.add_argument("--large", type=int, metavar="N", help="Stream N generated points per epoch")
+    large.add_argument("--data", metavar="PREFIX", help="Train from memory-mapped PREFIX_X.npy / PREFIX_y.npy "
+                       "(written first from --large N if missing)")
+    large.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    large.add_argument("--std", type=float, default=4.0, help="Cluster std for generated data")
+    sweep = parser.add_argument_group("hyperparameter sweep (process pool, small multiples)")
+    sweep.add_argument("--sweep", action="store_true", help="Train the grid below instead of animating one run")
+    sweep.add_argument("--alphas", type=float, nargs="+", default=[1e-4, 5e-4, 1e-3, 1e-2])
+    sweep.add_argument("--schedules", nargs="+", choices=SCHEDULES, default=SCHEDULES)
+    sweep.add_argument("--stds", type=float, nargs="+", default=[2.0, 4.0, 8.0])
+    sweep.add_argument("--sizes", type=int, nargs="+", default=[200, 1000])
+    sweep.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+    if args.large is not None and args.large < 1:
+        parser.error("--large must be at least 1")
+    return args
+
 
 # -----------------------
 # Data
 # -----------------------
-np.random.seed(0)
-X, y = make_blobs(n_samples=200, centers=2, random_state=10, cluster_std=4.0)
+def make_data():
+    np.random.seed(0)
+    X, y = make_blobs(n_samples=200, centers=2, random_state=10, cluster_std=4.0)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42
+    )
+    return X, X_train, X_test, y_train, y_test
 
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
 
 # -----------------------
 # Model
 # -----------------------
-model = SGDClassifier(
-    loss="log_loss",
-    penalty="l2",
-    alpha=0.0005,
-    learning_rate="optimal",
-    random_state=0
-)
+def train_frames(X, X_train, X_test, y_train, y_test, epochs):
+    """Train all epochs first; each frame holds only what the renderer updates."""
+    model = make_model()
+    classes = np.unique(y_train)
 
-classes = np.unique(y_train)
+    # grid for boundary
+    extent = (X[:, 0].min() - 1, X[:, 0].max() + 1, X[:, 1].min() - 1, X[:, 1].max() + 1)
+    xx, yy = np.meshgrid(
+        np.linspace(extent[0], extent[1], 200),
+        np.linspace(extent[2], extent[3], 200),
+    )
+    grid = np.column_stack([xx.ravel(), yy.ravel()])
 
-# grid for boundary
-x_min, x_max = X[:, 0].min() - 1, X[:, 0].max() + 1
-y_min, y_max = X[:, 1].min() - 1, X[:, 1].max() + 1
-xx, yy = np.meshgrid(
-    np.linspace(x_min, x_max, 200),
-    np.linspace(y_min, y_max, 200),
-)
+    frames = []
+    for epoch in range(epochs):
+        # incremental training
+        model.partial_fit(X_train, y_train, classes=classes)
+        y_pred = model.predict(X_test)
+        scores = grid @ model.coef_[0] + model.intercept_[0]
+        frames.append({
+            "epoch": epoch,
+            "y_pred": y_pred,
+            "accuracy": accuracy_score(y_test, y_pred),
+            "boundary": (scores > 0).reshape(xx.shape).astype(np.int8),
+            "confusion": confusion_matrix(y_test, y_pred, labels=classes),
+        })
+    return frames, extent, classes
 
-plt.ion()
-fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
 
-epochs = 40
+def make_model():
+    return SGDClassifier(
+        loss="log_loss",
+        penalty="l2",
+        alpha=0.0005,
+        learning_rate="optimal",
+        random_state=0
+    )
 
-for epoch in range(epochs):
 
-    # incremental training
-    if epoch == 0:
-        model.partial_fit(X_train, y_train, classes=classes)
+def train_large(args):
+    """Stream mini-batches through partial_fit; return per-epoch stats and a plot sample."""
+    rng = np.random.default_rng(0)
+    if args.data:
+        if not os.path.exists(f"{args.data}_X.npy"):
+            if not args.large:
+                raise SystemExit(f"{args.data}_X.npy not found; pass --large N to generate it.")
+            write_blobs_npy(args.data, args.large, args.std, args.batch_size)
+        X, y = load_memmap(args.data)
+        # the tail of the file is held out for accuracy
+        n_holdout = holdout_size(len(y))
+        if n_holdout < 1:
+            raise SystemExit(f"{args.data}_X.npy has {len(y)} rows; at least 5 are needed to hold some out.")
+        X_test, y_test = np.asarray(X[-n_holdout:]), np.asarray(y[-n_holdout:])
+        X, y = X[:-n_holdout], y[:-n_holdout]
+        epoch_batches = lambda epoch: memmap_batches(X, y, args.batch_size, rng)
+        X_plot, y_plot = sample_rows(X, y, PLOT_SAMPLE, rng)
     else:
-        model.partial_fit(X_train, y_train)
+        X_test, y_test = sample_blobs(HOLDOUT_POINTS, args.std, np.random.default_rng(1), blob_centers())
+        epoch_batches = lambda epoch: generated_batches(args.large, args.std, args.batch_size, rng=rng)
+        X_plot, y_plot = next(generated_batches(min(args.large, PLOT_SAMPLE), args.std, PLOT_SAMPLE))
 
-    y_pred = model.predict(X_test)
-    acc = accuracy_score(y_test, y_pred)
+    frames = []
+    for stats in stream_training(make_model(), epoch_batches, args.epochs, X_test, y_test):
+        print(
+            f"epoch {stats.epoch+1}/{args.epochs}: {stats.samples:,} samples in {stats.seconds:.2f}s "
+            f"({stats.samples_per_second:,.0f} samples/s), accuracy {stats.accuracy*100:.2f}%"
+        )
+        frames.append(stats)
+    return frames, X_plot, y_plot
 
-    correct = y_pred == y_test
-    incorrect = ~correct
 
-    Z = model.predict(np.c_[xx.ravel(), yy.ravel()]).reshape(xx.shape)
+# -----------------------
+# Rendering
+# -----------------------
+class BlitRenderer:
+    """Creates every artist once; update() only swaps data so FuncAnimation can blit."""
 
-    ax1.clear()
-    ax2.clear()
+    def __init__(self, ax1, ax2, X_train, X_test, y_train, y_test, extent, classes, epochs):
+        self.y_test = y_test
+        self.epochs = epochs
 
-    # boundary
-    ax1.contourf(xx, yy, Z, alpha=0.2, cmap="RdBu")
+        # boundary: a class-index image instead of re-running contourf
+        self.boundary = ax1.imshow(
+            np.zeros((2, 2)), extent=extent, origin="lower", aspect="auto",
+            cmap="RdBu", vmin=0, vmax=1, alpha=0.2, interpolation="nearest", animated=True
+        )
 
-    # train
-    ax1.scatter(
-        X_train[:, 0], X_train[:, 1],
-        c=y_train, cmap="RdBu",
-        edgecolors="k", alpha=0.6,
-        label="Train"
-    )
+        # train (static)
+        ax1.scatter(
+            X_train[:, 0], X_train[:, 1],
+            c=y_train, cmap="RdBu",
+            edgecolors="k", alpha=0.6
+        )
 
-    # correct
-    ax1.scatter(
-        X_test[correct, 0], X_test[correct, 1],
-        c=y_test[correct], cmap="RdBu",
-        edgecolors="black",
-        s=70,
-        label="Test correct"
-    )
+        # test points live in both layers; per-point size 0 hides them
+        self.correct = ax1.scatter(
+            X_test[:, 0], X_test[:, 1],
+            c=y_test, cmap="RdBu",
+            edgecolors="black",
+            s=np.zeros(len(y_test)),
+            animated=True
+        )
+        self.incorrect = ax1.scatter(
+            X_test[:, 0], X_test[:, 1],
+            c=y_test, cmap="RdBu",
+            marker="X",
+            edgecolors="black",
+            s=np.zeros(len(y_test)),
+            animated=True
+        )
+
+        ax1.set_xlim(extent[0], extent[1])
+        ax1.set_ylim(extent[2], extent[3])
+        ax1.legend(handles=[
+            Line2D([], [], marker="o", linestyle="", markerfacecolor="grey", markeredgecolor="k", alpha=0.6, label="Train"),
+            Line2D([], [], marker="o", linestyle="", markerfacecolor="grey", markeredgecolor="k", markersize=9, label="Test correct"),
+            Line2D([], [], marker="X", linestyle="", markerfacecolor="grey", markeredgecolor="k", markersize=12, label="Test incorrect"),
+        ], loc="lower right")
+        # Drawn inside the axes so it is covered by the blitted region.
+        self.title = ax1.text(
+            0.02, 0.97, "", transform=ax1.transAxes, va="top", fontsize=12,
+            bbox={"facecolor": "white", "alpha": 0.8, "edgecolor": "none"}, animated=True
+        )
+
+        # confusion matrix
+        self.vmax = len(y_test)
+        self.matrix = ax2.imshow(
+            np.zeros((len(classes), len(classes))), cmap="Greys", vmin=0, vmax=self.vmax, animated=True
+        )
+        self.cells = [
+            [ax2.text(j, i, "", ha="center", va="center", animated=True) for j in range(len(classes))]
+            for i in range(len(classes))
+        ]
+        ax2.set_xticks(range(len(classes)), labels=classes)
+        ax2.set_yticks(range(len(classes)), labels=classes)
+        ax2.set_xlabel("Predicted label")
+        ax2.set_ylabel("True label")
+        ax2.set_title("Confusion Matrix")
+
+    def artists(self):
+        return [self.boundary, self.correct, self.incorrect, self.title, self.matrix] + [
+            cell for row in self.cells for cell in row
+        ]
+
+    def update(self, frame):
+        correct = frame["y_pred"] == self.y_test
+        self.boundary.set_data(frame["boundary"])
+        self.correct.set_sizes(np.where(correct, 70, 0))
+        self.incorrect.set_sizes(np.where(correct, 0, 140))
+        self.title.set_text(
+            f"Epoch {frame['epoch']+1}/{self.epochs}   Accuracy: {frame['accuracy']*100:.1f}%"
+        )
+        cm = frame["confusion"]
+        self.matrix.set_data(cm)
+        for (i, j), value in np.ndenumerate(cm):
+            self.cells[i][j].set_text(str(value))
+            self.cells[i][j].set_color("white" if value > self.vmax / 2 else "black")
+        return self.artists()
+
+
+class DensityRenderer:
+    """Large-scale view: static density image; only the boundary line and label change."""
+
+    def __init__(self, ax, X_plot, y_plot, epochs):
+        self.epochs = epochs
+        self.extent = plot_extent(X_plot)
+        ax.imshow(
+            density_image(X_plot, y_plot, self.extent), extent=self.extent,
+            origin="lower", aspect="auto", interpolation="nearest"
+        )
+        (self.line,) = ax.plot([], [], color="black", linewidth=2, animated=True)
+        ax.set_xlim(self.extent[0], self.extent[1])
+        ax.set_ylim(self.extent[2], self.extent[3])
+        self.title = ax.text(
+            0.02, 0.97, "", transform=ax.transAxes, va="top", fontsize=12,
+            bbox={"facecolor": "white", "alpha": 0.8, "edgecolor": "none"}, animated=True
+        )
+
+    def artists(self):
+        return [self.line, self.title]
 
-    # incorrect — use filled X (no warning)
-    ax1.scatter(
-        X_test[incorrect, 0], X_test[incorrect, 1],
-        c=y_test[incorrect], cmap="RdBu",
-        marker="X",
-        edgecolors="black",
-        s=140,
-        label="Test incorrect"
+    def update(self, stats):
+        self.line.set_data(*boundary_segment(stats.weights, self.extent))
+        self.title.set_text(
+            f"Epoch {stats.epoch+1}/{self.epochs}   Accuracy: {stats.accuracy*100:.1f}%   "
+            f"{stats.samples_per_second:,.0f} samples/s"
+        )
+        return self.artists()
+
+
+def sweep(args, plt):
+    configs = sweep_grid(args.alphas, args.schedules, args.stds, args.sizes)
+    curves = run_sweep(configs, args.epochs, args.workers)
+    for config, accuracy in best_configs(configs, curves):
+        print(f"{accuracy*100:5.1f}%  {config}")
+    fig = plot_sweep(configs, curves)
+    if args.save:
+        fig.savefig(args.save, dpi=args.dpi)
+        print(f"Wrote {len(configs)} configurations to {args.save}")
+    else:
+        plt.show()
+
+
+def main():
+    args = parse_args()
+    if args.save:
+        matplotlib.use("Agg")  # headless: no window, no pause between frames
+    import matplotlib.pyplot as plt
+    from matplotlib.animation import FFMpegWriter, FuncAnimation, PillowWriter, writers
+
+    if args.sweep:
+        sweep(args, plt)
+        return
+
+    if args.large or args.data:
+        frames, X_plot, y_plot = train_large(args)
+        fig, ax = plt.subplots(figsize=(9, 7))
+        renderer = DensityRenderer(ax, X_plot, y_plot, args.epochs)
+    else:
+        X, X_train, X_test, y_train, y_test = make_data()
+        frames, extent, classes = train_frames(X, X_train, X_test, y_train, y_test, args.epochs)
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
+        renderer = BlitRenderer(ax1, ax2, X_train, X_test, y_train, y_test, extent, classes, args.epochs)
+    animation = FuncAnimation(
+        fig,
+        renderer.update,
+        frames=frames,
+        init_func=renderer.artists,
+        interval=args.interval,
+        blit=True,
+        repeat=False,
+        cache_frame_data=False,
     )
 
-    ax1.set_xlim(x_min, x_max)
-    ax1.set_ylim(y_min, y_max)
-    ax1.set_title(f"Epoch {epoch+1}/{epochs}   Accuracy: {acc*100:.1f}%")
-    ax1.legend()
+    if not args.save:
+        plt.show()
+        return
 
-    # confusion matrix
-    cm = confusion_matrix(y_test, y_pred)
-    disp = ConfusionMatrixDisplay(cm)
-    disp.plot(ax=ax2, cmap="Greys", colorbar=False)
-    ax2.set_title("Confusion Matrix")
+    if args.save.lower().endswith(".gif"):
+        writer = PillowWriter(fps=args.fps)
+    elif writers.is_available("ffmpeg"):
+        writer = FFMpegWriter(fps=args.fps)
+    else:
+        raise SystemExit("Saving MP4 needs ffmpeg on PATH; use a .gif path instead.")
+    animation.save(args.save, writer=writer, dpi=args.dpi)
+    print(f"Wrote {len(frames)} frames to {args.save}")
 
-    fig.canvas.draw_idle()
-    plt.pause(0.35)
 
-plt.ioff()
-plt.show()
+if __name__ == "__main__":
+    main()
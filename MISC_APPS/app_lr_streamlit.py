@@ -1,5 +1,9 @@
+import json
+from string import Template
+
 import numpy as np
 import streamlit as st
+import streamlit.components.v1 as components
 import matplotlib.pyplot as plt
 
 from sklearn.datasets import make_blobs
@@ -7,8 +11,260 @@ from sklearn.model_selection import train_test_split
 from sklearn.linear_model import SGDClassifier
 from sklearn.metrics import accuracy_score
 
+from lr_stream import (
+    DEFAULT_BATCH_SIZE, HOLDOUT_POINTS, PLOT_SAMPLE, blob_centers, boundary_segment,
+    density_image, generated_batches, plot_extent, sample_blobs, stream_training,
+)
+from lr_sweep import SCHEDULES, best_configs, plot_sweep, run_sweep, sweep_grid
+
 st.set_page_config(layout="wide")
 
+GRID_RESOLUTION = 200
+SERVER_MODE = "Rerun per epoch"
+CLIENT_MODE = "Animate in browser"
+# RdBu end colours, matching the Matplotlib plots (class 0 red, class 1 blue).
+CLASS_COLORS = ["#b2182b", "#2166ac"]
+
+
+@st.cache_resource(show_spinner=False)
+def make_dataset(std, n_points):
+    """Blobs and train/test split; depends only on the sliders, so reruns reuse it."""
+    X, y = make_blobs(
+        n_samples=n_points,
+        centers=2,
+        cluster_std=std,
+        random_state=10
+    )
+    splits = train_test_split(X, y, test_size=0.2, random_state=42)
+    arrays = (X, *splits)
+    for array in arrays:
+        array.flags.writeable = False  # shared across reruns and sessions
+    return arrays
+
+
+@st.cache_resource(show_spinner=False)
+def make_grid(std, n_points, resolution=GRID_RESOLUTION):
+    """Boundary grid plus its flattened (resolution**2, 2) point array."""
+    X = make_dataset(std, n_points)[0]
+    x_min, x_max = X[:, 0].min() - 1, X[:, 0].max() + 1
+    y_min, y_max = X[:, 1].min() - 1, X[:, 1].max() + 1
+    xx, yy = np.meshgrid(
+        np.linspace(x_min, x_max, resolution),
+        np.linspace(y_min, y_max, resolution)
+    )
+    points = np.column_stack([xx.ravel(), yy.ravel()])
+    for array in (xx, yy, points):
+        array.flags.writeable = False
+    return xx, yy, points
+
+
+def boundary_labels(model, points, shape):
+    """Predicted class per grid point from one matrix product (binary decision_function)."""
+    scores = points @ model.coef_[0] + model.intercept_[0]
+    return model.classes_[(scores > 0).astype(int)].reshape(shape)
+
+
+def make_model():
+    return SGDClassifier(
+        loss="log_loss",
+        learning_rate="optimal",
+        alpha=0.0005,
+        random_state=0
+    )
+
+
+@st.cache_data(show_spinner=False)
+def train_history(std, n_points, epochs):
+    """Train every epoch up front; return per-epoch (w0, w1, b) rows and test accuracy."""
+    _, X_train, X_test, y_train, y_test = make_dataset(std, n_points)
+    classes = np.unique(y_train)
+    model = make_model()
+    weights = np.empty((epochs, 3), dtype=np.float32)
+    accuracy = np.empty(epochs, dtype=np.float32)
+    for epoch in range(epochs):
+        model.partial_fit(X_train, y_train, classes=classes)
+        weights[epoch] = (model.coef_[0, 0], model.coef_[0, 1], model.intercept_[0])
+        accuracy[epoch] = accuracy_score(y_test, model.predict(X_test))
+    return weights, accuracy
+
+
+# Canvas player: the boundary of a linear model is a line, so each frame only
+# needs (w0, w1, b); half-planes and test-point correctness are computed here.
+ANIMATION_TEMPLATE = Template("""
+<div style="font-family: sans-serif">
+  <div id="title" style="font-weight: 600; margin-bottom: 4px"></div>
+  <canvas id="plot" width="720" height="480" style="border: 1px solid #ddd"></canvas>
+  <div style="margin-top: 6px">
+    <button id="play">Pause</button>
+    <input id="scrub" type="range" min="0" value="0" style="width: 600px">
+  </div>
+</div>
+<script>
+const data = $payload;
+const canvas = document.getElementById("plot");
+const ctx = canvas.getContext("2d");
+const scrub = document.getElementById("scrub");
+const playButton = document.getElementById("play");
+const [xMin, xMax, yMin, yMax] = data.bounds;
+const W = canvas.width, H = canvas.height;
+const px = x => (x - xMin) / (xMax - xMin) * W;
+const py = y => H - (y - yMin) / (yMax - yMin) * H;
+const corners = [[xMin, yMin], [xMax, yMin], [xMax, yMax], [xMin, yMax]];
+scrub.max = data.weights.length - 1;
+
+function halfPlane(w, sign) {
+  // Clip the plot rectangle to {p : sign * (w0*x + w1*y + b) > 0}.
+  const score = p => sign * (w[0] * p[0] + w[1] * p[1] + w[2]);
+  const out = [];
+  for (let i = 0; i < 4; i++) {
+    const a = corners[i], b = corners[(i + 1) % 4];
+    const sa = score(a), sb = score(b);
+    if (sa > 0) out.push(a);
+    if ((sa > 0) !== (sb > 0)) {
+      const t = sa / (sa - sb);
+      out.push([a[0] + t * (b[0] - a[0]), a[1] + t * (b[1] - a[1])]);
+    }
+  }
+  return out;
+}
+
+function fillPolygon(points, color) {
+  if (points.length < 3) return;
+  ctx.beginPath();
+  points.forEach(([x, y], i) => i ? ctx.lineTo(px(x), py(y)) : ctx.moveTo(px(x), py(y)));
+  ctx.closePath();
+  ctx.globalAlpha = 0.25;
+  ctx.fillStyle = color;
+  ctx.fill();
+  ctx.globalAlpha = 1;
+}
+
+function dot(x, y, r, color, alpha) {
+  ctx.globalAlpha = alpha;
+  ctx.beginPath();
+  ctx.arc(px(x), py(y), r, 0, 2 * Math.PI);
+  ctx.fillStyle = color;
+  ctx.fill();
+  ctx.strokeStyle = "black";
+  ctx.stroke();
+  ctx.globalAlpha = 1;
+}
+
+function cross(x, y, r, color) {
+  ctx.lineWidth = 4;
+  ctx.strokeStyle = color;
+  ctx.beginPath();
+  ctx.moveTo(px(x) - r, py(y) - r); ctx.lineTo(px(x) + r, py(y) + r);
+  ctx.moveTo(px(x) - r, py(y) + r); ctx.lineTo(px(x) + r, py(y) - r);
+  ctx.stroke();
+  ctx.lineWidth = 1;
+}
+
+function draw(frame) {
+  const w = data.weights[frame];
+  ctx.clearRect(0, 0, W, H);
+  fillPolygon(halfPlane(w, 1), data.colors[1]);
+  fillPolygon(halfPlane(w, -1), data.colors[0]);
+  data.train.forEach(([x, y, label]) => dot(x, y, 3, data.colors[label], 0.6));
+  data.test.forEach(([x, y, label]) => {
+    const predicted = w[0] * x + w[1] * y + w[2] > 0 ? 1 : 0;
+    if (predicted === label) dot(x, y, 5, data.colors[label], 1);
+    else cross(x, y, 6, data.colors[label]);
+  });
+  document.getElementById("title").textContent =
+    `Epoch $${frame + 1}/$${data.weights.length} | Accuracy: $${(data.accuracy[frame] * 100).toFixed(1)}%`;
+  scrub.value = frame;
+}
+
+let frame = 0, playing = true, last = 0;
+function tick(now) {
+  if (playing && now - last >= 1000 / data.fps) {
+    last = now;
+    draw(frame);
+    if (frame === data.weights.length - 1) { playing = false; playButton.textContent = "Replay"; }
+    else frame += 1;
+  }
+  requestAnimationFrame(tick);
+}
+playButton.onclick = () => {
+  if (!playing && frame === data.weights.length - 1) frame = 0;
+  playing = !playing;
+  playButton.textContent = playing ? "Pause" : "Play";
+};
+scrub.oninput = () => { playing = false; playButton.textContent = "Play"; frame = +scrub.value; draw(frame); };
+draw(0);
+requestAnimationFrame(tick);
+</script>
+""")
+
+
+@st.cache_resource(show_spinner=False)
+def large_plot_data(std, n_points):
+    """Density image of a plot-sized subsample and a holdout set for the large mode."""
+    X_plot, y_plot = next(generated_batches(min(n_points, PLOT_SAMPLE), std, PLOT_SAMPLE))
+    extent = plot_extent(X_plot)
+    X_holdout, y_holdout = sample_blobs(HOLDOUT_POINTS, std, np.random.default_rng(1), blob_centers())
+    return density_image(X_plot, y_plot, extent), extent, X_holdout, y_holdout
+
+
+def run_large_scale(plot_area, stats_area, std, n_points, batch_size, epochs, train):
+    """Stream generated mini-batches through partial_fit, redrawing only the boundary line."""
+    density, extent, X_holdout, y_holdout = large_plot_data(std, n_points)
+    fig, ax = plt.subplots(figsize=(6, 4))
+    ax.imshow(density, extent=extent, origin="lower", aspect="auto", interpolation="nearest")
+    ax.set_xlim(extent[0], extent[1])
+    ax.set_ylim(extent[2], extent[3])
+    ax.set_title(f"{n_points:,} points, STD = {std} (before training)")
+    plot_area.pyplot(fig, width="content")
+    if train:
+        (line,) = ax.plot([], [], color="black", linewidth=2)
+        rng = np.random.default_rng(0)
+        batches = lambda epoch: generated_batches(n_points, std, batch_size, rng=rng)
+        for stats in stream_training(make_model(), batches, epochs, X_holdout, y_holdout):
+            line.set_data(*boundary_segment(stats.weights, extent))
+            ax.set_title(f"Epoch {stats.epoch+1}/{epochs} | Accuracy: {stats.accuracy*100:.1f}%")
+            plot_area.pyplot(fig, width="content")
+            stats_area.metric("Throughput", f"{stats.samples_per_second:,.0f} samples/s")
+    plt.close(fig)
+
+
+@st.cache_data(show_spinner=False)
+def cached_sweep(alphas, schedules, stds, sizes, epochs):
+    """Accuracy curves for the whole grid, trained in a process pool."""
+    return run_sweep(sweep_grid(alphas, schedules, stds, sizes), epochs)
+
+
+def render_sweep(alphas, schedules, stds, sizes, epochs):
+    configs = sweep_grid(alphas, schedules, stds, sizes)
+    with st.spinner(f"Training {len(configs)} configurations..."):
+        curves = cached_sweep(alphas, schedules, stds, sizes, epochs)
+    fig = plot_sweep(configs, curves)
+    st.pyplot(fig)
+    plt.close(fig)
+    st.dataframe(
+        [{**vars(config), "final_accuracy": round(accuracy * 100, 1)} for config, accuracy in best_configs(configs, curves, top=10)],
+        width="stretch"
+    )
+
+
+def render_client_animation(X_train, y_train, X_test, y_test, bounds, weights, accuracy, fps):
+    """Ship the run to the browser once and animate it there at ``fps``."""
+    classes = np.unique(np.concatenate([y_train, y_test]))
+    payload = {
+        "bounds": [round(float(v), 3) for v in bounds],
+        "weights": np.round(weights, 5).tolist(),
+        "accuracy": np.round(accuracy, 4).tolist(),
+        "train": [[*np.round(p, 3).tolist(), int(np.searchsorted(classes, c))] for p, c in zip(X_train, y_train)],
+        "test": [[*np.round(p, 3).tolist(), int(np.searchsorted(classes, c))] for p, c in zip(X_test, y_test)],
+        "colors": CLASS_COLORS,
+        "fps": fps,
+    }
+    html = ANIMATION_TEMPLATE.substitute(payload=json.dumps(payload))
+    if hasattr(st, "iframe"):
+        st.iframe(html, height=560)
+    else:  # Streamlit releases before st.iframe
+        components.html(html, height=560)
+
 
 
 # -----------------------
@@ -39,6 +295,24 @@ epochs = st.sidebar.slider(
     step=1
 )
 
+large_scale = st.sidebar.checkbox("Large-scale streaming", help="Mini-batch SGD over generated data")
+if large_scale:
+    large_points = st.sidebar.select_slider(
+        "Streamed points per epoch",
+        options=[100_000, 500_000, 1_000_000, 2_000_000, 5_000_000],
+        value=1_000_000
+    )
+    batch_size = st.sidebar.select_slider(
+        "Mini-batch size",
+        options=[256, 1024, DEFAULT_BATCH_SIZE, 16384],
+        value=DEFAULT_BATCH_SIZE
+    )
+
+animation_mode = st.sidebar.radio("Animation", [SERVER_MODE, CLIENT_MODE])
+fps = 10
+if animation_mode == CLIENT_MODE:
+    fps = st.sidebar.slider("Frames per second", min_value=1, max_value=60, value=10)
+
 if "training" not in st.session_state:
     st.session_state.training = False
 
@@ -46,27 +320,34 @@ if "epoch" not in st.session_state:
     st.session_state.epoch = 0
 if "model" not in st.session_state:
     st.session_state.model = None
+if "client_animation" not in st.session_state:
+    st.session_state.client_animation = False
+if "sweep" not in st.session_state:
+    st.session_state.sweep = False
 
 def start_training():
     st.session_state.training = True
     st.session_state.epoch = 0
     st.session_state.model = None
+    st.session_state.sweep = False
+
+def start_sweep():
+    st.session_state.training = False
+    st.session_state.sweep = True
 
 st.sidebar.button("Start Training", on_click=start_training)
 
+with st.sidebar.expander("Hyperparameter sweep"):
+    sweep_alphas = st.multiselect("alpha", [1e-5, 1e-4, 5e-4, 1e-3, 1e-2, 1e-1], default=[1e-4, 5e-4, 1e-2])
+    sweep_schedules = st.multiselect("Learning rate schedule", SCHEDULES, default=SCHEDULES)
+    sweep_stds = st.multiselect("Std Deviation", [0.5, 1.0, 2.0, 4.0, 6.0, 8.0], default=[2.0, 4.0, 8.0])
+    sweep_sizes = st.multiselect("Number of points", [100, 200, 500, 1000], default=[200, 1000])
+    st.button("Run sweep", on_click=start_sweep)
+
 # -----------------------
 # Data generation
 # -----------------------
-X, y = make_blobs(
-    n_samples=n_points,
-    centers=2,
-    cluster_std=std,
-    random_state=10
-)
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
+X, X_train, X_test, y_train, y_test = make_dataset(std, n_points)
 
 # -----------------------
 # Step 1: show data only
@@ -74,7 +355,36 @@ X_train, X_test, y_train, y_test = train_test_split(
 
 plot_area = st.empty()
 
-if not st.session_state.training:
+if st.session_state.sweep:
+    if all([sweep_alphas, sweep_schedules, sweep_stds, sweep_sizes]):
+        render_sweep(
+            tuple(sorted(sweep_alphas)), tuple(sweep_schedules),
+            tuple(sorted(sweep_stds)), tuple(sorted(sweep_sizes)), epochs
+        )
+    else:
+        st.warning("Pick at least one value for every sweep parameter.")
+    st.stop()
+
+if large_scale:
+    run_large_scale(plot_area, st.empty(), std, large_points, batch_size, epochs, st.session_state.training)
+    st.session_state.training = False
+    st.stop()
+
+if animation_mode == CLIENT_MODE and st.session_state.training:
+    # The whole run is trained here and animated by the browser; no per-epoch reruns.
+    st.session_state.training = False
+    st.session_state.client_animation = True
+
+if animation_mode == CLIENT_MODE and st.session_state.client_animation:
+    xx, yy, _ = make_grid(std, n_points)
+    weights, accuracy = train_history(std, n_points, epochs)
+    with plot_area.container():
+        render_client_animation(
+            X_train, y_train, X_test, y_test,
+            (xx[0, 0], xx[0, -1], yy[0, 0], yy[-1, 0]),
+            weights, accuracy, fps
+        )
+elif not st.session_state.training:
     fig, ax = plt.subplots(figsize=(6, 4))
     ax.scatter(X_train[:, 0], X_train[:, 1], c=y_train, cmap="RdBu", edgecolors="k", label="Train")
     ax.scatter(X_test[:, 0], X_test[:, 1], c=y_test, cmap="RdBu", marker="x", label="Test")
@@ -90,20 +400,10 @@ if st.session_state.training:
 
     classes = np.unique(y_train)
 
-    x_min, x_max = X[:, 0].min() - 1, X[:, 0].max() + 1
-    y_min, y_max = X[:, 1].min() - 1, X[:, 1].max() + 1
-    xx, yy = np.meshgrid(
-        np.linspace(x_min, x_max, 200),
-        np.linspace(y_min, y_max, 200)
-    )
+    xx, yy, grid_points = make_grid(std, n_points)
 
     if st.session_state.model is None:
-        model = SGDClassifier(
-            loss="log_loss",
-            learning_rate="optimal",
-            alpha=0.0005,
-            random_state=0
-        )
+        model = make_model()
         model.partial_fit(X_train, y_train, classes=classes)
         st.session_state.model = model
     else:
@@ -117,7 +417,7 @@ if st.session_state.training:
     correct = y_pred == y_test
     incorrect = ~correct
 
-    Z = st.session_state.model.predict(np.c_[xx.ravel(), yy.ravel()]).reshape(xx.shape)
+    Z = boundary_labels(st.session_state.model, grid_points, xx.shape)
 
     # ---- boundary plot ----
     fig, ax = plt.subplots(figsize=(6, 4))
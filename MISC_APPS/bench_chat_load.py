@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""Offline load test for the sales comp chat agent.
+
+Starts fake_openai_server in-process, builds ``salesCompAgent`` against it and
+drives ``agent.graph`` with many concurrent simulated sessions the same way
+app_chat.py does (stream_mode=["messages", "updates"]). Reports throughput,
+p50/p99 turn latency, time to first token and memory per session. No network
+access is needed; exit status is non-zero when a --max/--min gate fails.
+
+    python bench_chat_load.py --sessions 50 --concurrency 10 --turns 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fake_openai_server import FakeOpenAIConfig, start_server
+
+APP_DIR = Path(__file__).resolve().parent
+
+QUESTIONS = [
+    "How should we set quota for a new enterprise rep?",
+    "What is a typical accelerator above 100% attainment?",
+    "Design a SPIF for Q4 renewals.",
+    "How do clawbacks work for churned deals?",
+    "Should SDRs be paid on meetings or pipeline?",
+]
+
+
+@dataclass
+class TurnResult:
+    latency: float
+    ttft: Optional[float]
+    error: Optional[str] = None
+
+
+@dataclass
+class Report:
+    sessions: int
+    turns: int
+    concurrency: int
+    errors: int
+    wall_seconds: float
+    throughput_turns_per_s: float
+    latency_p50: float
+    latency_p99: float
+    ttft_p50: float
+    ttft_p99: float
+    memory_per_session_kb: float
+    node_seconds_p50: Dict[str, float] = field(default_factory=dict)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def current_rss_kb() -> float:
+    try:
+        with open("/proc/self/status") as handle:
+            for line in handle:
+                if line.startswith("VmRSS:"):
+                    return float(line.split()[1])
+    except OSError:
+        pass
+    import resource
+
+    return float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def write_offline_secrets(base_url: str, workdir: Path) -> None:
+    """Streamlit reads secrets from ./.streamlit/secrets.toml; point it at the fake server."""
+    secrets_dir = workdir / ".streamlit"
+    secrets_dir.mkdir(parents=True, exist_ok=True)
+    (secrets_dir / "secrets.toml").write_text(
+        "\n".join(
+            [
+                'OPENAI_MODEL = "fake-model"',
+                'OPENAI_SENTIMENT_MODEL = "fake-mini"',
+                f'OPENAI_BASE_URL = "{base_url}"',
+                f'CHECKPOINT_DB_PATH = "{workdir / "checkpoints.sqlite3"}"',
+            ]
+        )
+        + "\n"
+    )
+
+
+def build_agent(use_cache: bool):
+    from langgraph.checkpoint.memory import MemorySaver
+
+    from graph import salesCompAgent
+    from response_cache import ResponseCache
+
+    # In-memory checkpoints keep per-thread state resident, like a long-lived server.
+    return salesCompAgent(
+        "offline-key",
+        "fake-embedding",
+        response_cache=None if use_cache else ResponseCache(max_entries=0),
+        checkpointer=MemorySaver(),
+    )
+
+
+def run_session(agent, session_index: int, turns: int) -> List[TurnResult]:
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    from graph import STREAMING_NODES, turn_input
+
+    history = []
+    results: List[TurnResult] = []
+    config = {"configurable": {"thread_id": f"bench-{session_index}"}}
+    for turn in range(turns):
+        question = f"{QUESTIONS[(session_index + turn) % len(QUESTIONS)]} (session {session_index}, turn {turn})"
+        history.append(HumanMessage(content=question))
+        parameters = turn_input(question, list(history))
+        start = time.perf_counter()
+        ttft = None
+        answer = ""
+        try:
+            for mode, payload in agent.graph.stream(parameters, config, stream_mode=["messages", "updates"]):
+                if mode != "messages":
+                    continue
+                chunk, metadata = payload
+                if metadata.get("langgraph_node") in STREAMING_NODES and chunk.content:
+                    if ttft is None:
+                        ttft = time.perf_counter() - start
+                    answer += chunk.content
+        except Exception as exc:
+            results.append(TurnResult(time.perf_counter() - start, ttft, str(exc)))
+            continue
+        results.append(TurnResult(time.perf_counter() - start, ttft))
+        history.append(AIMessage(content=answer))
+    return results
+
+
+def node_timing_medians(agent, sessions: int) -> Dict[str, float]:
+    samples: Dict[str, List[float]] = {}
+    for index in range(sessions):
+        state = agent.graph.get_state({"configurable": {"thread_id": f"bench-{index}"}})
+        for node, seconds in (state.values.get("node_timings") or {}).items():
+            samples.setdefault(node, []).append(seconds)
+    return {node: round(percentile(values, 50), 4) for node, values in sorted(samples.items())}
+
+
+def run_benchmark(args: argparse.Namespace) -> Report:
+    config = FakeOpenAIConfig(args.latency, args.tokens_per_second, args.response_tokens)
+    server = start_server(config)
+    host, port = server.server_address[:2]
+    workdir = Path(tempfile.mkdtemp(prefix="chat-bench-"))
+    write_offline_secrets(f"http://{host}:{port}/v1", workdir)
+    os.environ.setdefault("LANGCHAIN_TRACING_V2", "false")
+    sys.path.insert(0, str(APP_DIR))
+    original_cwd = os.getcwd()
+    os.chdir(workdir)
+
+    try:
+        agent = build_agent(args.cache)
+        run_session(agent, -1, 1)  # Warm up imports, pools and graph compilation.
+
+        rss_before = current_rss_kb()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            futures = [pool.submit(run_session, agent, index, args.turns) for index in range(args.sessions)]
+            results = [turn for future in futures for turn in future.result()]
+        wall = time.perf_counter() - start
+        rss_after = current_rss_kb()
+        node_seconds = node_timing_medians(agent, args.sessions)
+    finally:
+        server.shutdown()
+        os.chdir(original_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    ok = [r for r in results if r.error is None]
+    errors = [r for r in results if r.error is not None]
+    for error in {r.error for r in errors}:
+        print(f"error: {error}", file=sys.stderr)
+    ttfts = [r.ttft for r in ok if r.ttft is not None]
+    latencies = [r.latency for r in ok]
+    return Report(
+        sessions=args.sessions,
+        turns=len(results),
+        concurrency=args.concurrency,
+        errors=len(errors),
+        wall_seconds=round(wall, 3),
+        throughput_turns_per_s=round(len(ok) / wall, 2) if wall else 0.0,
+        latency_p50=round(percentile(latencies, 50), 4),
+        latency_p99=round(percentile(latencies, 99), 4),
+        ttft_p50=round(percentile(ttfts, 50), 4),
+        ttft_p99=round(percentile(ttfts, 99), 4),
+        memory_per_session_kb=round(max(rss_after - rss_before, 0.0) / max(args.sessions, 1), 1),
+        node_seconds_p50=node_seconds,
+    )
+
+
+def check_gates(report: Report, args: argparse.Namespace) -> List[str]:
+    failures = []
+    if report.errors:
+        failures.append(f"{report.errors} turns failed")
+    if args.max_p99_latency is not None and report.latency_p99 > args.max_p99_latency:
+        failures.append(f"p99 latency {report.latency_p99}s > {args.max_p99_latency}s")
+    if args.max_p50_ttft is not None and report.ttft_p50 > args.max_p50_ttft:
+        failures.append(f"p50 TTFT {report.ttft_p50}s > {args.max_p50_ttft}s")
+    if args.min_throughput is not None and report.throughput_turns_per_s < args.min_throughput:
+        failures.append(f"throughput {report.throughput_turns_per_s}/s < {args.min_throughput}/s")
+    return failures
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Offline load test for app_chat.py / graph.py with a stub LLM.")
+    p.add_argument("--sessions", type=int, default=20, help="Simulated chat sessions")
+    p.add_argument("--concurrency", type=int, default=10, help="Sessions running at once")
+    p.add_argument("--turns", type=int, default=3, help="Questions per session")
+    p.add_argument("--latency", type=float, default=0.2, help="Fake server delay before first token (s)")
+    p.add_argument("--tokens-per-second", type=float, default=50.0, help="Fake server token rate")
+    p.add_argument("--response-tokens", type=int, default=60, help="Tokens per fake answer")
+    p.add_argument("--cache", action="store_true", help="Keep the response cache enabled")
+    p.add_argument("--json", type=Path, help="Also write the report to this JSON file")
+    p.add_argument("--max-p99-latency", type=float, help="Fail if p99 turn latency exceeds this (s)")
+    p.add_argument("--max-p50-ttft", type=float, help="Fail if median time to first token exceeds this (s)")
+    p.add_argument("--min-throughput", type=float, help="Fail if turns/s falls below this")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.json:
+        args.json = args.json.resolve()  # run_benchmark changes directory
+    report = run_benchmark(args)
+    for key, value in asdict(report).items():
+        print(f"{key:>24}: {value}")
+    if args.json:
+        args.json.write_text(json.dumps(asdict(report), indent=2))
+    failures = check_gates(report, args)
+    for failure in failures:
+        print(f"GATE FAILED: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""SQLite persistence for chat conversations.
+
+Listing returns titles only (keyset-paginated by last update); message bodies
+are read when a conversation is opened, and saves append only new messages.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+TITLE_LENGTH = 40
+
+
+class ConversationStore:
+    def __init__(self, db_path: str) -> None:
+        path = Path(db_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self.init_db()
+
+    def init_db(self) -> None:
+        with self._lock:
+            self.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS conversations (
+                    thread_id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    short_title TEXT,
+                    message_count INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+                );
+                CREATE TABLE IF NOT EXISTS conversation_messages (
+                    thread_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (thread_id, seq)
+                );
+                CREATE INDEX IF NOT EXISTS idx_conversations_user_updated
+                    ON conversations(user_id, updated_at DESC, thread_id DESC);
+                """
+            )
+            self.conn.commit()
+
+    def list_conversations(
+        self,
+        user_id: str,
+        limit: int = 20,
+        before: Optional[Dict[str, str]] = None,
+    ) -> List[Dict[str, object]]:
+        """Return one page of conversation headers, newest first.
+
+        Pass the last row of the previous page as ``before`` to get the next page.
+        """
+        params: list = [str(user_id)]
+        keyset = ""
+        if before:
+            keyset = "AND (updated_at, thread_id) < (?, ?)"
+            params.extend([before["updated_at"], before["thread_id"]])
+        params.append(limit)
+        rows = self.conn.execute(
+            f"""
+            SELECT thread_id, short_title, message_count, updated_at
+            FROM conversations
+            WHERE user_id = ? {keyset}
+            ORDER BY updated_at DESC, thread_id DESC
+            LIMIT ?
+            """,
+            params,
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def load_messages(self, thread_id) -> List[Dict[str, str]]:
+        rows = self.conn.execute(
+            "SELECT role, content FROM conversation_messages WHERE thread_id = ? ORDER BY seq",
+            (str(thread_id),),
+        ).fetchall()
+        return [{"role": row["role"], "content": row["content"]} for row in rows]
+
+    def save_messages(self, thread_id, user_id, messages: List[Dict[str, str]]) -> int:
+        """Append messages not yet stored for thread_id; return how many were written."""
+        thread_id = str(thread_id)
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT message_count FROM conversations WHERE thread_id = ?", (thread_id,)
+            ).fetchone()
+            stored = row["message_count"] if row else 0
+            new_messages = [
+                (thread_id, seq, m["role"], m["content"])
+                for seq, m in enumerate(messages)
+                if seq >= stored and m.get("role") != "system"
+            ]
+            if row is None:
+                first_user = next((m["content"] for m in messages if m.get("role") == "user"), "")
+                self.conn.execute(
+                    """
+                    INSERT INTO conversations (thread_id, user_id, short_title, updated_at)
+                    VALUES (?, ?, ?, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+                    """,
+                    (thread_id, str(user_id), first_user[:TITLE_LENGTH].strip() or None),
+                )
+            if not new_messages:
+                return 0
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO conversation_messages (thread_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                new_messages,
+            )
+            self.conn.execute(
+                """
+                UPDATE conversations
+                SET message_count = ?, updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+                WHERE thread_id = ?
+                """,
+                (len(messages), thread_id),
+            )
+            return len(new_messages)
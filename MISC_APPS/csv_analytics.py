@@ -0,0 +1,208 @@
+"""Local pandas analytics over uploaded CSVs for the sales comp agent.
+
+The LLM only ever sees the schema and small result tables; the rows stay
+in a typed DataFrame that is parsed once per upload and reused across turns.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+AGGREGATIONS = ["sum", "mean", "median", "min", "max", "count", "nunique"]
+FILTER_OPS = ["==", "!=", ">", ">=", "<", "<=", "contains"]
+MAX_RESULT_ROWS = 20
+NUMERIC_PARSE_THRESHOLD = 0.95
+CATEGORY_MAX_RATIO = 0.5
+SAMPLE_ROWS = 200
+
+
+class FilterSpec(BaseModel):
+    column: str
+    op: str
+    value: str
+
+
+class AnalyticsPlan(BaseModel):
+    uses_data: bool = True
+    aggregation: str
+    metric_column: Optional[str] = None
+    group_by: List[str] = []
+    filters: List[FilterSpec] = []
+    sort_descending: bool = True
+    top_n: int = MAX_RESULT_ROWS
+
+
+@dataclass
+class Dataset:
+    key: str
+    name: str
+    frame: pd.DataFrame
+    schema: str
+
+
+def _parses(series: pd.Series, parse) -> bool:
+    converted = parse(series)
+    return converted.notna().sum() >= NUMERIC_PARSE_THRESHOLD * series.notna().sum()
+
+
+def _to_numeric(series: pd.Series) -> pd.Series:
+    cleaned = series.astype(str).str.replace(r"[,$%\s]", "", regex=True)
+    return pd.to_numeric(cleaned, errors="coerce")
+
+
+def _to_datetime(series: pd.Series) -> pd.Series:
+    return pd.to_datetime(series, errors="coerce", format="mixed")
+
+
+def _coerce(series: pd.Series, parse) -> Optional[pd.Series]:
+    # Reject on a small sample first so free-text columns stay cheap.
+    sample = series.dropna().head(SAMPLE_ROWS)
+    if not _parses(sample, parse):
+        return None
+    converted = parse(series)
+    if converted.notna().sum() >= NUMERIC_PARSE_THRESHOLD * series.notna().sum():
+        return converted
+    return None
+
+
+def load_csv(data: bytes) -> pd.DataFrame:
+    """Parse CSV bytes and tighten dtypes (numbers, dates, categories)."""
+    frame = pd.read_csv(io.BytesIO(data), low_memory=False)
+    frame.columns = [str(column).strip() for column in frame.columns]
+    for column in frame.columns:
+        series = frame[column]
+        is_text = pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+        if not is_text or series.notna().sum() == 0:
+            continue
+        converted = _coerce(series, _to_numeric)
+        if converted is None:
+            converted = _coerce(series, _to_datetime)
+        if converted is None and series.nunique() <= CATEGORY_MAX_RATIO * len(series):
+            converted = series.astype("category")
+        if converted is not None:
+            frame[column] = converted
+    for column in frame.select_dtypes(include="integer").columns:
+        frame[column] = pd.to_numeric(frame[column], downcast="integer")
+    return frame
+
+
+def describe_schema(frame: pd.DataFrame, name: str = "dataset") -> str:
+    """Compact schema summary that is safe to put in a prompt."""
+    lines = [f"Table '{name}' with {len(frame):,} rows and {len(frame.columns)} columns:"]
+    for column in frame.columns:
+        series = frame[column]
+        if pd.api.types.is_numeric_dtype(series):
+            detail = f"min={series.min()}, max={series.max()}"
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            detail = f"from {series.min()} to {series.max()}"
+        else:
+            top = series.value_counts().head(5).index.tolist()
+            detail = f"{series.nunique():,} distinct, e.g. {top}"
+        lines.append(f"- {column} ({series.dtype}): {detail}")
+    return "\n".join(lines)
+
+
+def _filter_mask(frame: pd.DataFrame, spec: FilterSpec) -> pd.Series:
+    series = frame[spec.column]
+    if spec.op == "contains":
+        return series.astype(str).str.contains(spec.value, case=False, na=False, regex=False)
+    value: object = spec.value
+    if pd.api.types.is_numeric_dtype(series):
+        value = float(spec.value.replace(",", "").replace("$", ""))
+    elif pd.api.types.is_datetime64_any_dtype(series):
+        value = pd.Timestamp(spec.value)
+    elif spec.op in ("==", "!="):
+        # Case-insensitive match for text and categories.
+        matches = series.astype(str).str.lower() == spec.value.lower()
+        return matches if spec.op == "==" else ~matches
+    comparisons = {
+        "==": series.__eq__,
+        "!=": series.__ne__,
+        ">": series.__gt__,
+        ">=": series.__ge__,
+        "<": series.__lt__,
+        "<=": series.__le__,
+    }
+    return comparisons[spec.op](value)
+
+
+def run_plan(frame: pd.DataFrame, plan: AnalyticsPlan) -> pd.DataFrame:
+    """Execute an aggregation plan with vectorized pandas operations."""
+    if plan.aggregation not in AGGREGATIONS:
+        raise ValueError(f"Unsupported aggregation: {plan.aggregation}")
+    referenced = list(plan.group_by) + [f.column for f in plan.filters]
+    if plan.metric_column:
+        referenced.append(plan.metric_column)
+    missing = [column for column in referenced if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Unknown columns: {missing}")
+    if plan.aggregation not in ("count", "nunique") and not plan.metric_column:
+        raise ValueError(f"Aggregation '{plan.aggregation}' needs a metric column")
+
+    mask = np.ones(len(frame), dtype=bool)
+    for spec in plan.filters:
+        if spec.op not in FILTER_OPS:
+            raise ValueError(f"Unsupported filter operator: {spec.op}")
+        mask &= _filter_mask(frame, spec).to_numpy(dtype=bool, na_value=False)
+    subset = frame[mask] if plan.filters else frame
+
+    metric = plan.metric_column
+    label = f"{plan.aggregation}_{metric}" if metric else plan.aggregation
+    if plan.group_by:
+        grouped = subset.groupby(plan.group_by, observed=True, sort=False)
+        values = grouped[metric].agg(plan.aggregation) if metric else grouped.size()
+        result = values.rename(label).reset_index()
+        result = result.sort_values(label, ascending=not plan.sort_descending)
+        return result.head(max(1, min(plan.top_n, MAX_RESULT_ROWS)))
+
+    if metric:
+        value = subset[metric].agg(plan.aggregation)
+    else:
+        value = len(subset)
+    return pd.DataFrame({label: [value], "matching_rows": [len(subset)]})
+
+
+def summarize_result(result: pd.DataFrame) -> str:
+    return result.head(MAX_RESULT_ROWS).to_csv(index=False)
+
+
+class DatasetStore:
+    """LRU of parsed uploads keyed by content hash; one per session (see app_chat.py)."""
+
+    def __init__(self, max_datasets: int = 8) -> None:
+        self.max_datasets = max_datasets
+        self._datasets: "OrderedDict[str, Dataset]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, data: bytes, name: str = "dataset") -> str:
+        """Parse the upload unless an identical file is already loaded; return its key."""
+        key = hashlib.sha256(data).hexdigest()[:24]
+        with self._lock:
+            if key in self._datasets:
+                self._datasets.move_to_end(key)
+                return key
+        frame = load_csv(data)
+        dataset = Dataset(key, name, frame, describe_schema(frame, name))
+        with self._lock:
+            self._datasets[key] = dataset
+            while len(self._datasets) > self.max_datasets:
+                self._datasets.popitem(last=False)
+        return key
+
+    def get(self, key: Optional[str]) -> Optional[Dataset]:
+        if not key:
+            return None
+        with self._lock:
+            dataset = self._datasets.get(key)
+            if dataset is not None:
+                self._datasets.move_to_end(key)
+            return dataset
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Apify actor/dataset API used by app_linked_scraper.py.
+
+Serves the endpoints ``ApifyClient`` hits when starting an actor, waiting for
+the run and reading its dataset. Each run returns one page of fake reactions or
+comments for ``page_number``; runs take ``run_seconds`` and more than
+``max_concurrent_runs`` at once get HTTP 429, so pacing and backoff can be
+exercised offline. Point the app at it with ``APIFY_API_URL``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeApifyConfig:
+    def __init__(
+        self,
+        reactions: int = 1500,
+        comments: int = 2500,
+        run_seconds: float = 0.5,
+        max_concurrent_runs: int = 8,
+    ) -> None:
+        self.reactions = reactions
+        self.comments = comments
+        self.run_seconds = run_seconds
+        self.max_concurrent_runs = max_concurrent_runs
+        self.runs: Dict[str, Dict[str, Any]] = {}
+        self.datasets: Dict[str, List[dict]] = {}
+        self.started = 0
+        self.rate_limited = 0
+        self.lock = threading.Lock()
+
+    def active_runs(self, now: float) -> int:
+        return sum(1 for run in self.runs.values() if run["finishes_at"] > now)
+
+
+def fake_items(actor_id: str, run_input: Dict[str, Any], config: FakeApifyConfig) -> List[dict]:
+    page = int(run_input.get("page_number", 1))
+    limit = int(run_input.get("limit", 100))
+    if "reaction" in actor_id:
+        total, kind = config.reactions, "reaction"
+    else:
+        total, kind = config.comments, "comment"
+    items = []
+    for index in range((page - 1) * limit, min(page * limit, total)):
+        person = {
+            "name": f"Person {index}",
+            "headline": f"{kind.title()} headline {index}",
+            "profile_url": f"https://www.linkedin.com/in/person-{kind}-{index}",
+        }
+        if kind == "reaction":
+            items.append({"reaction_type": ["LIKE", "PRAISE", "EMPATHY"][index % 3], "reactor": person})
+        else:
+            items.append({"comment_id": f"c{index}", "comment_text": f"Comment number {index}", "commenter": person})
+    return items
+
+
+def make_handler(config: FakeApifyConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args) -> None:  # Keep test output clean
+            return
+
+        def _send_json(self, payload: Any, status: int = 200, headers: Dict[str, str] = None) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _run_payload(self, run: Dict[str, Any]) -> Dict[str, Any]:
+            status = "SUCCEEDED" if time.monotonic() >= run["finishes_at"] else "RUNNING"
+            return {"data": {"id": run["id"], "status": status, "defaultDatasetId": run["dataset_id"]}}
+
+        def do_POST(self) -> None:
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length)
+            if self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            if len(parts) != 4 or parts[:2] != ["v2", "acts"] or parts[3] != "runs":
+                self._send_json({"error": {"message": f"Unknown path {url.path}"}}, status=404)
+                return
+            actor_id = parts[2].replace("~", "/")
+            run_input = json.loads(body or b"{}")
+            now = time.monotonic()
+            with config.lock:
+                if config.active_runs(now) >= config.max_concurrent_runs:
+                    config.rate_limited += 1
+                    self._send_json(
+                        {"error": {"type": "rate-limit-exceeded", "message": "Too many concurrent runs"}},
+                        status=429,
+                    )
+                    return
+                run = {
+                    "id": uuid.uuid4().hex[:17],
+                    "dataset_id": uuid.uuid4().hex[:17],
+                    "finishes_at": now + config.run_seconds,
+                }
+                config.runs[run["id"]] = run
+                config.datasets[run["dataset_id"]] = fake_items(actor_id, run_input, config)
+                config.started += 1
+            self._send_json(self._run_payload(run), status=201)
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            parts = url.path.strip("/").split("/")
+            if len(parts) == 3 and parts[:2] == ["v2", "actor-runs"] and parts[2] in config.runs:
+                run = config.runs[parts[2]]
+                wait = float(query.get("waitForFinish", ["0"])[0])
+                remaining = run["finishes_at"] - time.monotonic()
+                if remaining > 0 and wait > 0:
+                    time.sleep(min(remaining, wait))
+                self._send_json(self._run_payload(run))
+            elif len(parts) == 4 and parts[:2] == ["v2", "datasets"] and parts[3] == "items":
+                items = config.datasets.get(parts[2], [])
+                offset = int(query.get("offset", ["0"])[0])
+                limit = int(query.get("limit", [str(len(items))])[0])
+                page = items[offset:offset + limit]
+                self._send_json(page, headers={
+                    "X-Apify-Pagination-Total": str(len(items)),
+                    "X-Apify-Pagination-Offset": str(offset),
+                    "X-Apify-Pagination-Limit": str(limit),
+                    "X-Apify-Pagination-Count": str(len(page)),
+                    "X-Apify-Pagination-Desc": "false",
+                })
+            else:
+                self._send_json({"error": {"message": f"Unknown path {url.path}"}}, status=404)
+
+    return Handler
+
+
+class FakeApifyServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address) -> None:
+        # Cancelled prefetches drop their connections; that is expected here.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_server(config: FakeApifyConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serve in a daemon thread; port 0 picks a free port (see server.server_address)."""
+    server = FakeApifyServer((host, port), make_handler(config))
+    threading.Thread(target=server.serve_forever, name="fake-apify", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a fake Apify API for offline scraper testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--reactions", type=int, default=1500)
+    parser.add_argument("--comments", type=int, default=2500)
+    parser.add_argument("--run-seconds", type=float, default=0.5, help="Duration of each actor run")
+    parser.add_argument("--max-concurrent-runs", type=int, default=8, help="Runs beyond this get HTTP 429")
+    args = parser.parse_args()
+
+    config = FakeApifyConfig(args.reactions, args.comments, args.run_seconds, args.max_concurrent_runs)
+    server = FakeApifyServer((args.host, args.port), make_handler(config))
+    print(f"Fake Apify API on http://{args.host}:{args.port} (set APIFY_API_URL to this)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Local stand-in for the OpenAI chat/embeddings API with tunable latency.
+
+Answers ``/v1/chat/completions`` (streamed and non-streamed, including
+JSON-schema and tool-call structured output) and ``/v1/embeddings`` without
+any network access, so load tests can run on an isolated box.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+WORDS = (
+    "quota attainment accelerator commission plan territory SPIF payout cap "
+    "draw clawback ramp booking renewal multiplier tier"
+).split()
+
+
+def sample_from_schema(schema: Dict[str, Any], defs: Optional[Dict[str, Any]] = None, name: str = "") -> Any:
+    """Build a minimal value that validates against a JSON schema."""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return sample_from_schema(defs[schema["$ref"].split("/")[-1]], defs, name)
+    if "anyOf" in schema:
+        return sample_from_schema(schema["anyOf"][0], defs, name)
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type", "object")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        return {
+            key: sample_from_schema(prop, defs, key)
+            for key, prop in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return []
+    if kind == "boolean":
+        return name != "uses_data"
+    if kind in ("integer", "number"):
+        return 1
+    if kind == "null":
+        return None
+    return "neutral" if name == "category" else "stub"
+
+
+class FakeOpenAIConfig:
+    def __init__(self, latency: float = 0.2, tokens_per_second: float = 50.0, response_tokens: int = 60) -> None:
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def make_handler(config: FakeOpenAIConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args) -> None:  # Keep benchmark output clean
+            return
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            with config.lock:
+                config.requests += 1
+            if self.path.rstrip("/").endswith("/embeddings"):
+                self._embeddings(body)
+            elif self.path.rstrip("/").endswith("/chat/completions"):
+                self._chat(body)
+            else:
+                self._send_json({"error": {"message": f"Unknown path {self.path}"}}, status=404)
+
+        def _send_json(self, payload: Dict[str, Any], status: int = 200) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _embeddings(self, body: Dict[str, Any]) -> None:
+            inputs = body.get("input")
+            inputs = inputs if isinstance(inputs, list) else [inputs]
+            data = []
+            for index, text in enumerate(inputs):
+                digest = hashlib.sha256(str(text).encode("utf-8")).digest()
+                data.append({"object": "embedding", "index": index, "embedding": [b / 255 for b in digest[:32]]})
+            self._send_json({"object": "list", "data": data, "model": body.get("model"), "usage": {"prompt_tokens": 0, "total_tokens": 0}})
+
+        def _chat(self, body: Dict[str, Any]) -> None:
+            time.sleep(config.latency)
+            tool_call = None
+            response_format = body.get("response_format") or {}
+            if body.get("tools"):
+                function = body["tools"][0]["function"]
+                tool_call = {
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "type": "function",
+                    "function": {
+                        "name": function["name"],
+                        "arguments": json.dumps(sample_from_schema(function.get("parameters", {}))),
+                    },
+                }
+                content = ""
+            elif response_format.get("type") == "json_schema":
+                content = json.dumps(sample_from_schema(response_format["json_schema"]["schema"]))
+            else:
+                content = " ".join(WORDS[i % len(WORDS)] for i in range(config.response_tokens))
+
+            if body.get("stream"):
+                self._stream(body, content, tool_call)
+                return
+
+            time.sleep(len(content.split()) / config.tokens_per_second)
+            message: Dict[str, Any] = {"role": "assistant", "content": content or None}
+            if tool_call:
+                message["tool_calls"] = [tool_call]
+            self._send_json({
+                "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_call else "stop"}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": len(content.split()), "total_tokens": 10 + len(content.split())},
+            })
+
+        def _stream(self, body: Dict[str, Any], content: str, tool_call: Optional[Dict[str, Any]]) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+            def emit(delta: Dict[str, Any], finish_reason: Optional[str] = None, choices: Optional[List] = None, **extra) -> None:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": choices if choices is not None else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                    **extra,
+                }
+                self._write_chunk(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+
+            emit({"role": "assistant", "content": ""})
+            if tool_call:
+                emit({"tool_calls": [{"index": 0, **tool_call}]})
+            else:
+                pieces = content.split(" ")
+                for index, piece in enumerate(pieces):
+                    emit({"content": piece if index == 0 else f" {piece}"})
+                    time.sleep(1 / config.tokens_per_second)
+            emit({}, finish_reason="tool_calls" if tool_call else "stop")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                tokens = len(content.split())
+                emit({}, choices=[], usage={"prompt_tokens": 10, "completion_tokens": tokens, "total_tokens": 10 + tokens})
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+
+        def _write_chunk(self, data: bytes) -> None:
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address) -> None:
+        # Load-test clients time out and drop streams mid-response; that is expected here.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_server(config: FakeOpenAIConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serve in a daemon thread; port 0 picks a free port (see server.server_address)."""
+    server = FakeOpenAIServer((host, port), make_handler(config))
+    threading.Thread(target=server.serve_forever, name="fake-openai", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI-compatible API for offline testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--response-tokens", type=int, default=60)
+    args = parser.parse_args()
+
+    config = FakeOpenAIConfig(args.latency, args.tokens_per_second, args.response_tokens)
+    server = FakeOpenAIServer((args.host, args.port), make_handler(config))
+    print(f"Fake OpenAI API on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Local stand-in for the parts of the Stripe API used by test_stripe.py.
+
+Serves customers (list by email, create), subscription checkout sessions
+(create, retrieve with ``expand[]=subscription``) and subscription
+retrieval, honours ``Idempotency-Key``
+by replaying the first response, and counts requests so caching can be
+checked offline. Point the app at it with ``STRIPE_API_BASE``.
+
+``GET /checkout/<session id>`` plays the hosted checkout page: it completes
+the session, creates an active subscription and redirects to the success URL.
+With a webhook URL and secret, the matching signed events are delivered to
+stripe_webhooks.py as well.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+import urllib.request
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from stripe_webhooks import sign_payload
+
+
+class FakeStripeState:
+    def __init__(self, webhook_url: Optional[str] = None, webhook_secret: Optional[str] = None) -> None:
+        self.base_url = ""
+        self.webhook_url = webhook_url
+        self.webhook_secret = webhook_secret
+        self.customers: Dict[str, Dict[str, Any]] = {}
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.subscriptions: Dict[str, Dict[str, Any]] = {}
+        self.idempotent: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self.requests: Counter = Counter()
+        self.lock = threading.Lock()
+
+    def send_event(self, event_type: str, obj: Dict[str, Any]) -> Dict[str, Any]:
+        """Deliver a signed event in the background (if a webhook is configured) and return it."""
+        event = {
+            "id": new_id("evt"),
+            "object": "event",
+            "type": event_type,
+            "created": int(time.time()),
+            "data": {"object": dict(obj)},
+        }
+        if self.webhook_url and self.webhook_secret:
+            payload = json.dumps(event).encode("utf-8")
+            request = urllib.request.Request(self.webhook_url, data=payload, method="POST", headers={
+                "Content-Type": "application/json",
+                "Stripe-Signature": sign_payload(payload, self.webhook_secret),
+            })
+            threading.Thread(target=lambda: urllib.request.urlopen(request, timeout=10).close(), daemon=True).start()
+        return event
+
+    def cancel_subscription(self, subscription_id: str) -> Dict[str, Any]:
+        subscription = self.subscriptions[subscription_id]
+        subscription["status"] = "canceled"
+        return self.send_event("customer.subscription.deleted", subscription)
+
+    def complete_session(self, session_id: str, async_payment: bool = False) -> Dict[str, Any]:
+        """What a successful hosted checkout does: an active subscription for the customer.
+
+        With ``async_payment`` the session completes "unpaid" and the
+        subscription stays incomplete until settle_async_payment().
+        """
+        session = self.sessions[session_id]
+        if session["status"] != "complete":
+            subscription = {
+                "id": new_id("sub"),
+                "object": "subscription",
+                "customer": session["customer"],
+                "status": "incomplete" if async_payment else "active",
+                "created": int(time.time()),
+            }
+            self.subscriptions[subscription["id"]] = subscription
+            payment_status = "unpaid" if async_payment else "paid"
+            session.update(status="complete", payment_status=payment_status, subscription=subscription["id"])
+            self.send_event("customer.subscription.created", subscription)
+            self.send_event("checkout.session.completed", session)
+        return session
+
+    def settle_async_payment(self, session_id: str, succeeded: bool = True) -> Dict[str, Any]:
+        session = self.sessions[session_id]
+        subscription = self.subscriptions[session["subscription"]]
+        if succeeded:
+            session["payment_status"] = "paid"
+            subscription["status"] = "active"
+            self.send_event("customer.subscription.updated", subscription)
+            self.send_event("checkout.session.async_payment_succeeded", session)
+        else:
+            self.send_event("checkout.session.async_payment_failed", session)
+        return session
+
+
+def new_id(prefix: str) -> str:
+    return f"{prefix}_test_{uuid.uuid4().hex[:24]}"
+
+
+def flat_form(body: bytes) -> Dict[str, str]:
+    """``a[b][0]=c`` style form fields, kept flat (only the last value of each key)."""
+    return {key: values[-1] for key, values in parse_qs(body.decode("utf-8")).items()}
+
+
+def make_handler(state: FakeStripeState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args) -> None:  # Keep test output clean
+            return
+
+        def _send_json(self, payload: Any, status: int = 200) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Request-Id", new_id("req"))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _not_found(self, what: str) -> None:
+            self._send_json({"error": {"type": "invalid_request_error", "message": f"No such {what}"}}, status=404)
+
+        def _session_payload(self, session: Dict[str, Any], expand: bool) -> Dict[str, Any]:
+            payload = dict(session)
+            if expand and session["subscription"]:
+                payload["subscription"] = state.subscriptions[session["subscription"]]
+            return payload
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            parts = url.path.strip("/").split("/")
+            with state.lock:
+                state.requests[("GET", "/".join(parts[:3]))] += 1
+                if parts == ["v1", "customers"]:
+                    email = query.get("email", [None])[0]
+                    limit = int(query.get("limit", ["10"])[0])
+                    matches = [c for c in state.customers.values() if email is None or c["email"] == email]
+                    self._send_json({"object": "list", "url": "/v1/customers", "has_more": False, "data": matches[:limit]})
+                elif parts[:3] == ["v1", "checkout", "sessions"] and len(parts) == 4:
+                    session = state.sessions.get(parts[3])
+                    if session is None:
+                        self._not_found(f"checkout.session: '{parts[3]}'")
+                        return
+                    expand = "subscription" in sum((v for k, v in query.items() if k.startswith("expand")), [])
+                    self._send_json(self._session_payload(session, expand))
+                elif parts[:2] == ["v1", "subscriptions"] and len(parts) == 3:
+                    subscription = state.subscriptions.get(parts[2])
+                    if subscription is None:
+                        self._not_found(f"subscription: '{parts[2]}'")
+                        return
+                    self._send_json(subscription)
+                elif parts[0] == "checkout" and len(parts) == 2 and parts[1] in state.sessions:
+                    session = state.complete_session(parts[1])
+                    self.send_response(303)
+                    self.send_header("Location", session["success_url"].replace("{CHECKOUT_SESSION_ID}", session["id"]))
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                else:
+                    self._not_found(url.path)
+
+        def do_POST(self) -> None:
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            body = flat_form(self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+            key = self.headers.get("Idempotency-Key")
+            with state.lock:
+                state.requests[("POST", "/".join(parts[:3]))] += 1
+                if key and key in state.idempotent:
+                    self._send_json(*state.idempotent[key])
+                    return
+                result = self._create(parts, body)
+                if result is None:
+                    self._not_found(url.path)
+                    return
+                if key:
+                    state.idempotent[key] = result
+                self._send_json(*result)
+
+        def _create(self, parts, body: Dict[str, str]) -> Optional[Tuple[Dict[str, Any], int]]:
+            if parts == ["v1", "customers"]:
+                customer = {
+                    "id": new_id("cus"),
+                    "object": "customer",
+                    "email": body.get("email"),
+                    "name": body.get("name"),
+                    "metadata": {k[len("metadata["):-1]: v for k, v in body.items() if k.startswith("metadata[")},
+                    "created": int(time.time()),
+                }
+                state.customers[customer["id"]] = customer
+                return customer, 200
+            if parts == ["v1", "checkout", "sessions"]:
+                session_id = new_id("cs")
+                session = {
+                    "id": session_id,
+                    "object": "checkout.session",
+                    "mode": body.get("mode"),
+                    "customer": body.get("customer"),
+                    "status": "open",
+                    "payment_status": "unpaid",
+                    "subscription": None,
+                    "success_url": body.get("success_url"),
+                    "cancel_url": body.get("cancel_url"),
+                    "url": f"{state.base_url}/checkout/{session_id}",
+                }
+                state.sessions[session_id] = session
+                return session, 200
+            return None
+
+    return Handler
+
+
+def start_server(state: FakeStripeState, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serve in a daemon thread; port 0 picks a free port (see state.base_url)."""
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    state.base_url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, name="fake-stripe", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a fake Stripe API for offline testing of test_stripe.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=12111)
+    parser.add_argument("--webhook-url", help="e.g. http://127.0.0.1:4242/webhook (stripe_webhooks.py)")
+    parser.add_argument("--webhook-secret", help="Secret to sign deliveries with; same as the receiver's")
+    args = parser.parse_args()
+
+    state = FakeStripeState(args.webhook_url, args.webhook_secret)
+    state.base_url = f"http://{args.host}:{args.port}"
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    print(f"Fake Stripe API on {state.base_url} (set STRIPE_API_BASE to this)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
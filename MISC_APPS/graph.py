@@ -1,3 +1,6 @@
+import sqlite3
+import time
+
 import streamlit as st
 
 from pydantic import BaseModel
@@ -5,18 +8,34 @@ from typing import TypedDict
 
 
 
+import httpx
 from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, START, END
 from langchain_openai import ChatOpenAI
 from openai import OpenAI
 
+from csv_analytics import AGGREGATIONS, FILTER_OPS, AnalyticsPlan, DatasetStore, run_plan, summarize_result
+from response_cache import ResponseCache
+
+try:  # Optional: persist graph state per thread_id.
+    from langgraph.checkpoint.sqlite import SqliteSaver
+except ImportError:  # pragma: no cover - depends on the environment
+    SqliteSaver = None
+
 from pydantic import BaseModel
-from typing import TypedDict, Annotated, List
+from typing import TypedDict, Annotated, List, Optional
 import operator
 
 class Queries(BaseModel):
     queries: List[str]
 
+def merge_timings(current: Optional[dict], update: Optional[dict]) -> dict:
+    """Reducer for node_timings; passing None in the run input starts a fresh turn."""
+    if update is None:
+        return {}
+    return {**(current or {}), **update}
+
 class AgentState(TypedDict):
     agent: str
     initialMessage: str
@@ -27,50 +46,318 @@ class AgentState(TypedDict):
     message_history: list[BaseMessage]
     email: str
     name: str
-    csv_data: str
+    csv_data: Optional[str]
     analytics_question: str
+    cached: bool
+    analytics_result: str
+    analytics_schema: str
+    dataset_missing: bool
+    node_timings: Annotated[dict, merge_timings]
 
 class CategoryResponse(BaseModel):
     category: str
     response: str
 
+class SentimentResponse(BaseModel):
+    category: str
+
 VALID_CATEGORIES = ["negative", "positive", "neutral"]
 
+CLASSIFIER_PROMPT = "Classify the message sentiment as positive or negative or neutral. Also respond to the user with an answer, and a joke."
+RESPONDER_PROMPT = "Respond to the user with an answer, and a joke."
+SENTIMENT_PROMPT = "Classify the sentiment of the user's latest message as positive or negative or neutral."
+SUMMARY_PROMPT = ("Update the running summary of a sales compensation conversation with the new turns below. "
+                  "Keep facts, numbers, decisions and open questions. Reply with the summary only, under 200 words.")
+
+ANALYTICS_PLAN_PROMPT = ("You plan aggregate queries over an uploaded sales compensation dataset. "
+                         "Set uses_data to false if the question cannot be answered from this table. "
+                         "Aggregations: {aggregations}. Filter operators: {ops}. "
+                         "Use exact column names from the schema.\n\n{schema}")
+ANALYTICS_ANSWER_PROMPT = ("You are a sales compensation analyst. Answer the user's question using only the "
+                           "computed result below; do not invent numbers.\n\n{schema}\n\n{result}")
+DATASET_MISSING_RESPONSE = "That CSV is no longer loaded in this session. Please upload it again and re-ask your question."
+
+# Nodes whose LLM tokens the UI renders as they arrive (stream_mode="messages").
+STREAMING_NODE = "responder"
+STREAMING_NODES = {STREAMING_NODE, "analytics"}
+
+# Sentiment is a cheap side task, so it runs on a smaller model in parallel with the answer.
+SENTIMENT_MODEL = st.secrets.get("OPENAI_SENTIMENT_MODEL", "gpt-4o-mini")
+
+# Point at any OpenAI-compatible endpoint (e.g. fake_openai_server.py for load tests).
+OPENAI_BASE_URL = st.secrets.get("OPENAI_BASE_URL")
+
+# Shared connection pool limits for every session in this process.
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+CHECKPOINT_DB_PATH = st.secrets.get("CHECKPOINT_DB_PATH", "chat_checkpoints.sqlite3")
+
+RESPONSE_CACHE_SIZE = int(st.secrets.get("RESPONSE_CACHE_SIZE", 512))
+RESPONSE_CACHE_TTL = float(st.secrets.get("RESPONSE_CACHE_TTL", 3600))
+# Semantic matching costs one embedding call per lookup, so it is opt-in.
+RESPONSE_CACHE_SEMANTIC = str(st.secrets.get("RESPONSE_CACHE_SEMANTIC", False)).strip().lower() in {"1", "true", "yes", "on"}
+RESPONSE_CACHE_SIMILARITY = float(st.secrets.get("RESPONSE_CACHE_SIMILARITY", 0.95))
+
 def create_llm_msg(system_prompt: str, messageHistory: list[BaseMessage]):
     resp = []
     resp.append(SystemMessage(content=system_prompt))
     resp.extend(messageHistory)
     return resp
 
+def get_datasets(config: RunnableConfig) -> Optional[DatasetStore]:
+    """Per-session DatasetStore passed in through config["configurable"]."""
+    return (config or {}).get("configurable", {}).get("datasets")
+
+def turn_input(question: str, message_history: list[BaseMessage], csv_data: Optional[str] = None) -> dict:
+    """Run input for one chat turn.
+
+    The checkpointer keeps every state key per thread, so each per-turn field is
+    set here; otherwise an earlier turn's CSV, cache hit or analytics output
+    would carry over into this one. Only message_history spans the conversation.
+    """
+    return {
+        "initialMessage": question,
+        "analytics_question": question,
+        "message_history": message_history,
+        "csv_data": csv_data,
+        "cached": False,
+        "responseToUser": "",
+        "analytics_result": "",
+        "analytics_schema": "",
+        "dataset_missing": False,
+        "node_timings": None,
+    }
+
+def cacheable_question(message_history: list[BaseMessage]):
+    """Return the question text when the answer cannot depend on earlier turns."""
+    if len(message_history) == 1 and isinstance(message_history[0], HumanMessage):
+        return message_history[0].content
+    return None
+
+def timed(name: str, node):
+    """Wrap a node so its wall-clock duration lands in state['node_timings']."""
+    def run(state: AgentState, config: RunnableConfig):
+        start = time.perf_counter()
+        update = dict(node(state, config) or {})
+        update["node_timings"] = {name: round(time.perf_counter() - start, 4)}
+        return update
+    return run
+
 class salesCompAgent():
-    def __init__(self, api_key, embedding_model):
-        self.client = OpenAI(api_key=api_key)
-        self.model = ChatOpenAI(model=st.secrets['OPENAI_MODEL'], api_key=api_key)
+    """Compiled sales-comp graph; safe to share across sessions and turns.
+
+    Nothing session-specific is stored on the instance. Per-session values
+    (thread_id, datasets) travel in the run config instead.
+    """
+    def __init__(self, api_key, embedding_model, streaming=True, response_cache=None, embed=None, checkpointer=None):
+        self.streaming = streaming
+        self.embedding_model = embedding_model
+        self.model_name = st.secrets['OPENAI_MODEL']
+        self.http_client = httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        self.http_async_client = httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        self.client = OpenAI(api_key=api_key, base_url=OPENAI_BASE_URL, http_client=self.http_client)
+        self.model = ChatOpenAI(
+            model=self.model_name,
+            api_key=api_key,
+            base_url=OPENAI_BASE_URL,
+            http_client=self.http_client,
+            http_async_client=self.http_async_client,
+        )
+        self.sentiment_model = ChatOpenAI(
+            model=SENTIMENT_MODEL,
+            api_key=api_key,
+            base_url=OPENAI_BASE_URL,
+            temperature=0,
+            http_client=self.http_client,
+            http_async_client=self.http_async_client,
+        )
 
-        self.user_record = {}
-        if st.session_state.get("user_record"):
-            self.user_record = st.session_state.user_record
+        if response_cache is None:
+            if embed is None and RESPONSE_CACHE_SEMANTIC:
+                embed = self.embed_text
+            response_cache = ResponseCache(
+                max_entries=RESPONSE_CACHE_SIZE,
+                ttl_seconds=RESPONSE_CACHE_TTL,
+                embed=embed,
+                similarity_threshold=RESPONSE_CACHE_SIMILARITY,
+            )
+        self.response_cache = response_cache
+        self.system_prompt = RESPONDER_PROMPT if streaming else CLASSIFIER_PROMPT
+        answer_node = STREAMING_NODE if streaming else "classifier"
 
+        # Sentiment and the answer path are parallel branches that join at END.
+        nodes = {
+            "cache_lookup": self.cache_lookup,
+            "sentiment": self.sentiment_classifier,
+            "analytics_plan": self.analytics_plan,
+            "analytics": self.analytics_answer,
+        }
+        if streaming:
+            nodes[STREAMING_NODE] = self.responder
+        else:
+            nodes["classifier"] = self.initial_classifier
 
         workflow = StateGraph(AgentState)
-        workflow.add_node("classifier", self.initial_classifier)
+        for name, node in nodes.items():
+            workflow.add_node(name, timed(name, node))
+        for name in ("sentiment", "analytics", answer_node):
+            workflow.add_edge(name, END)
+        workflow.add_edge(START, "cache_lookup")
+        workflow.add_conditional_edges(
+            "cache_lookup",
+            lambda state: self.route_question(state, answer_node),
+            ["sentiment", "analytics_plan", answer_node],
+        )
+        workflow.add_conditional_edges(
+            "analytics_plan",
+            lambda state: self.route_analytics(state, answer_node),
+            ["analytics", answer_node, END],
+        )
+        self.graph = workflow.compile(checkpointer=checkpointer)
+
+    def route_question(self, state: AgentState, answer_node: str) -> list[str]:
+        if state.get("cached"):
+            return ["sentiment"]
+        if state.get("csv_data"):
+            return ["sentiment", "analytics_plan"]
+        if answer_node == "classifier":
+            # The combined classifier already produces the category.
+            return [answer_node]
+        return ["sentiment", answer_node]
+
+    def route_analytics(self, state: AgentState, answer_node: str) -> str:
+        if state.get("dataset_missing"):
+            return END
+        return "analytics" if state.get("analytics_result") else answer_node
+
+    def embed_text(self, text: str) -> list[float]:
+        return self.client.embeddings.create(model=self.embedding_model, input=text).data[0].embedding
+
+    def cache_lookup(self, state: AgentState, config: RunnableConfig):
+        question = cacheable_question(state['message_history'])
+        cached = None
+        if question and not state.get("csv_data"):
+            cached = self.response_cache.get(question, self.model_name, self.system_prompt)
+        if cached is None:
+            return {"cached": False}
+        print("response cache hit")
+        return {
+            "lnode": "cache_lookup",
+            "cached": True,
+            "responseToUser": cached,
+        }
 
-        workflow.add_edge(START, "classifier")
-        workflow.add_edge("classifier", END)
-        self.graph = workflow.compile()
+    def remember_response(self, state: AgentState, response: str) -> None:
+        question = cacheable_question(state['message_history'])
+        if question and not state.get("csv_data"):
+            self.response_cache.put(question, self.model_name, self.system_prompt, response)
 
-    def initial_classifier(self, state: AgentState):
+    def initial_classifier(self, state: AgentState, config: RunnableConfig):
         print("initial classifier")
-        CLASSIFIER_PROMPT = "Classify the message sentiment as positive or negative or neutral. Also respond to the user with an answer, and a joke."
         llm_messages = create_llm_msg(CLASSIFIER_PROMPT, state['message_history'])
         llm_response = self.model.with_structured_output(CategoryResponse).invoke(llm_messages)
         category = llm_response.category
         user_response = llm_response.response
         print(f"category is {category}, user-response is {user_response}")
+        self.remember_response(state, user_response)
         return{
             "lnode": "initial_classifier", 
             "category": category,
             "responseToUser": user_response
         }
 
-        
+    def summarize_history(self, previous_summary: str, messages: list[dict]) -> str:
+        """Fold older turns into the rolling summary used by history.HistoryWindow."""
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        llm_messages = [
+            SystemMessage(content=SUMMARY_PROMPT),
+            HumanMessage(content=f"Current summary: {previous_summary or '(none)'}\n\nNew turns:\n{transcript}"),
+        ]
+        return self.model.invoke(llm_messages).content
+
+    def responder(self, state: AgentState, config: RunnableConfig):
+        """Plain-text answer; its tokens surface through stream_mode="messages"."""
+        llm_messages = create_llm_msg(RESPONDER_PROMPT, state['message_history'])
+        llm_response = self.model.invoke(llm_messages, config)
+        self.remember_response(state, llm_response.content)
+        return {
+            "lnode": STREAMING_NODE,
+            "responseToUser": llm_response.content,
+        }
+
+    def sentiment_classifier(self, state: AgentState, config: RunnableConfig):
+        # Only the latest user message matters for sentiment; keep the prompt small.
+        latest = [m for m in state['message_history'] if isinstance(m, HumanMessage)][-1:]
+        llm_messages = create_llm_msg(SENTIMENT_PROMPT, latest)
+        llm_response = self.sentiment_model.with_structured_output(SentimentResponse).invoke(llm_messages, config)
+        category = llm_response.category.strip().lower()
+        if category not in VALID_CATEGORIES:
+            category = "neutral"
+        print(f"category is {category}")
+        # No "lnode" here: this branch runs in the same step as the answer node.
+        return {
+            "category": category,
+        }
+
+    def analytics_plan(self, state: AgentState, config: RunnableConfig):
+        """Turn the question into an aggregation and run it locally with pandas.
+
+        The dataset is looked up once here; the answer node gets its schema
+        through the state, since the session store may evict it in between.
+        """
+        datasets = get_datasets(config)
+        dataset = datasets.get(state.get("csv_data")) if datasets is not None else None
+        if dataset is None:
+            return {
+                "lnode": "analytics_plan",
+                "dataset_missing": True,
+                "analytics_result": "",
+                "responseToUser": DATASET_MISSING_RESPONSE,
+            }
+        question = state.get("analytics_question") or state['initialMessage']
+        llm_messages = [
+            SystemMessage(content=ANALYTICS_PLAN_PROMPT.format(
+                aggregations=", ".join(AGGREGATIONS),
+                ops=", ".join(FILTER_OPS),
+                schema=dataset.schema,
+            )),
+            HumanMessage(content=question),
+        ]
+        plan = self.model.with_structured_output(AnalyticsPlan).invoke(llm_messages, config)
+        if not plan.uses_data:
+            return {"lnode": "analytics_plan", "dataset_missing": False, "analytics_result": ""}
+        try:
+            result = run_plan(dataset.frame, plan)
+            summary = f"Query: {plan.model_dump_json(exclude={'uses_data'})}\nResult (CSV):\n{summarize_result(result)}"
+        except (ValueError, TypeError, KeyError) as exc:
+            summary = f"The requested analysis could not be computed: {exc}"
+        print(f"analytics result: {summary}")
+        return {
+            "lnode": "analytics_plan",
+            "dataset_missing": False,
+            "analytics_result": summary,
+            "analytics_schema": dataset.schema,
+        }
+
+    def analytics_answer(self, state: AgentState, config: RunnableConfig):
+        prompt = ANALYTICS_ANSWER_PROMPT.format(schema=state['analytics_schema'], result=state['analytics_result'])
+        llm_messages = create_llm_msg(prompt, state['message_history'])
+        llm_response = self.model.invoke(llm_messages, config)
+        return {
+            "lnode": "analytics",
+            "responseToUser": llm_response.content,
+        }
+
+
+def build_checkpointer(db_path: str = CHECKPOINT_DB_PATH):
+    """SQLite checkpointer keyed by the run config's thread_id, if installed."""
+    if SqliteSaver is None:
+        return None
+    return SqliteSaver(sqlite3.connect(db_path, check_same_thread=False))
+
+
+@st.cache_resource(show_spinner=False)
+def get_sales_comp_agent(api_key, embedding_model) -> salesCompAgent:
+    """Build the agent once per process and reuse it for every session."""
+    return salesCompAgent(api_key, embedding_model, checkpointer=build_checkpointer())
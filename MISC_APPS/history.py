@@ -0,0 +1,101 @@
+"""Token-budgeted conversation history for the chat agent."""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional
+
+import tiktoken
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+DEFAULT_ENCODING = "cl100k_base"
+# Rough per-message overhead of the chat format (role, separators).
+MESSAGE_OVERHEAD_TOKENS = 4
+
+Summarizer = Callable[[str, List[Dict[str, str]]], str]
+
+
+class HistoryWindow:
+    """Keep recent turns under a token budget and fold older ones into a summary.
+
+    Works on the ``{"role", "content"}`` dicts kept in ``st.session_state.messages``.
+    Each message's token count is cached on the dict itself under ``"tokens"``,
+    and the window remembers how far it has counted, so every call only costs
+    the messages added since the previous one.
+    """
+
+    def __init__(
+        self,
+        budget_tokens: int,
+        summarize: Optional[Summarizer] = None,
+        min_recent_messages: int = 2,
+        encoding_name: str = DEFAULT_ENCODING,
+    ) -> None:
+        self.budget_tokens = budget_tokens
+        self.summarize = summarize
+        self.min_recent_messages = min_recent_messages
+        self.encoder = tiktoken.get_encoding(encoding_name)
+        self.reset()
+
+    def reset(self) -> None:
+        self.summary = ""
+        self.summary_tokens = 0
+        self.window_start = 0
+        self.counted_upto = 0
+        self.window_tokens = 0
+
+    def count_tokens(self, message: Dict[str, str]) -> int:
+        if "tokens" not in message:
+            message["tokens"] = len(self.encoder.encode(message.get("content") or "")) + MESSAGE_OVERHEAD_TOKENS
+        return message["tokens"]
+
+    def build(self, messages: List[Dict[str, str]]) -> List[BaseMessage]:
+        """Return LangChain messages for the model: optional summary plus recent turns."""
+        if len(messages) < self.counted_upto:
+            # The list was replaced (e.g. another conversation was opened).
+            self.reset()
+
+        for message in messages[self.counted_upto:]:
+            if message.get("role") != "system":
+                self.window_tokens += self.count_tokens(message)
+        self.counted_upto = len(messages)
+
+        evicted: List[Dict[str, str]] = []
+        while (
+            self.window_tokens + self.summary_tokens > self.budget_tokens
+            and len(messages) - self.window_start > self.min_recent_messages
+        ):
+            message = messages[self.window_start]
+            self.window_start += 1
+            if message.get("role") == "system":
+                continue
+            self.window_tokens -= self.count_tokens(message)
+            evicted.append(message)
+
+        if evicted:
+            self._fold_into_summary(evicted)
+
+        history: List[BaseMessage] = []
+        if self.summary:
+            history.append(SystemMessage(content=f"Summary of the earlier conversation: {self.summary}"))
+        for message in messages[self.window_start:]:
+            if message.get("role") == "user":
+                history.append(HumanMessage(content=message["content"]))
+            elif message.get("role") == "assistant":
+                history.append(AIMessage(content=message["content"]))
+        return history
+
+    def _fold_into_summary(self, evicted: List[Dict[str, str]]) -> None:
+        if self.summarize is not None:
+            try:
+                self.summary = self.summarize(self.summary, evicted)
+            except Exception as exc:  # Keep chatting even if summarising fails
+                print(f"History summarisation failed: {exc}")
+                self.summary = self._fallback_summary(evicted)
+        else:
+            self.summary = self._fallback_summary(evicted)
+        self.summary_tokens = len(self.encoder.encode(self.summary)) + MESSAGE_OVERHEAD_TOKENS
+
+    def _fallback_summary(self, evicted: List[Dict[str, str]]) -> str:
+        """Keep just the user's earlier questions when no summariser is available."""
+        questions = [m["content"][:200] for m in evicted if m.get("role") == "user"]
+        return " | ".join(filter(None, [self.summary] + questions))[-2000:]
@@ -0,0 +1,87 @@
+"""Resize and re-encode uploaded logos into the renditions app.py stores.
+
+Each upload becomes WebP variants under a content-addressed prefix,
+``<account_id>/<sha256>/<variant>.webp``, so identical bytes always map to the
+same objects and the gallery can derive the thumbnail path from any row.
+"""
+
+from __future__ import annotations
+
+import io
+from typing import Dict, List, Optional
+
+from PIL import Image, ImageOps, ImageSequence
+
+VARIANT_FORMAT = "webp"
+# Longest edge in pixels; None keeps the source dimensions.
+VARIANT_SIZES: Dict[str, Optional[int]] = {"thumbnail": 256, "medium": 1024, "original": None}
+WEBP_QUALITY = 85
+
+
+def variant_path(account_id: str, digest: str, variant: str) -> str:
+    return f"{account_id}/{digest}/{variant}.{VARIANT_FORMAT}"
+
+
+def sibling_variant(storage_path: str, variant: str) -> Optional[str]:
+    """Path of another variant of a processed upload; None for legacy raw uploads."""
+    prefix, _, name = storage_path.rpartition("/")
+    if not prefix or name not in {f"{v}.{VARIANT_FORMAT}" for v in VARIANT_SIZES}:
+        return None
+    return f"{prefix}/{variant}.{VARIANT_FORMAT}"
+
+
+def _normalize(frame: Image.Image) -> Image.Image:
+    has_alpha = frame.mode in ("RGBA", "LA", "PA") or "transparency" in frame.info
+    return frame.convert("RGBA" if has_alpha else "RGB")
+
+
+def _fit(image: Image.Image, max_edge: Optional[int]) -> Image.Image:
+    if max_edge is None or max(image.size) <= max_edge:
+        return image
+    resized = image.copy()
+    resized.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+    return resized
+
+
+def _encode_animation(source: Image.Image) -> bytes:
+    frames: List[Image.Image] = []
+    durations: List[int] = []
+    for frame in ImageSequence.Iterator(source):
+        frames.append(_normalize(frame))
+        durations.append(frame.info.get("duration", 100))
+    out = io.BytesIO()
+    frames[0].save(
+        out,
+        VARIANT_FORMAT,
+        save_all=True,
+        append_images=frames[1:],
+        duration=durations,
+        loop=source.info.get("loop", 0),
+        quality=WEBP_QUALITY,
+    )
+    return out.getvalue()
+
+
+def render_variants(data: bytes) -> Dict[str, bytes]:
+    """Decode once and encode every variant; raises ValueError for unreadable images.
+
+    Animated sources keep their animation only in the original variant; the
+    smaller variants are a still of the first frame.
+    """
+    try:
+        source = Image.open(io.BytesIO(data))
+        source.load()
+    except (OSError, Image.DecompressionBombError) as exc:
+        raise ValueError(f"Not a readable image: {exc}") from exc
+
+    animated = getattr(source, "is_animated", False)
+    still = _normalize(ImageOps.exif_transpose(source))
+    variants: Dict[str, bytes] = {}
+    for variant, max_edge in VARIANT_SIZES.items():
+        if animated and max_edge is None:
+            variants[variant] = _encode_animation(source)
+            continue
+        out = io.BytesIO()
+        _fit(still, max_edge).save(out, VARIANT_FORMAT, quality=WEBP_QUALITY, method=4)
+        variants[variant] = out.getvalue()
+    return variants
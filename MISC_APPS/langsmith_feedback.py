@@ -0,0 +1,121 @@
+"""Background LangSmith feedback sender so UI callbacks never wait on the network."""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from langsmith import Client
+
+
+@dataclass
+class FeedbackItem:
+    run_id: str
+    key: str
+    score: Optional[float] = None
+    value: Optional[str] = None
+    source_info: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+
+
+class FeedbackQueue:
+    """Bounded queue drained by one worker thread that reuses a single client.
+
+    ``submit`` never blocks: when the queue is full the item is dropped and
+    counted (backpressure). LangSmith has no bulk feedback endpoint, so the
+    worker still makes one ``create_feedback`` call per item; it takes up to
+    ``drain_size`` items at a time so a failing drain backs off once, then
+    requeues its failures until ``max_attempts``.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Client] = Client,
+        max_queue: int = 1000,
+        drain_size: int = 20,
+        flush_interval: float = 1.0,
+        max_attempts: int = 4,
+        backoff_seconds: float = 0.5,
+    ) -> None:
+        self.client_factory = client_factory
+        self.drain_size = drain_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self._items: "queue.Queue[FeedbackItem]" = queue.Queue(maxsize=max_queue)
+        self._client: Optional[Client] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="langsmith-feedback", daemon=True)
+        self._thread.start()
+
+    @property
+    def client(self) -> Client:
+        if self._client is None:
+            self._client = self.client_factory()
+        return self._client
+
+    def submit(self, item: FeedbackItem) -> bool:
+        try:
+            self._items.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def pending(self) -> int:
+        return self._items.qsize()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the worker after trying to flush what is already queued."""
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        while not (self._stop.is_set() and self._items.empty()):
+            retry: List[FeedbackItem] = []
+            for item in self._drain():
+                if not self._send(item):
+                    item.attempts += 1
+                    if item.attempts < self.max_attempts:
+                        retry.append(item)
+                    else:
+                        self.failed += 1
+                        print(f"Giving up on LangSmith feedback for run {item.run_id}")
+            if retry:
+                attempts = max(item.attempts for item in retry)
+                time.sleep(min(self.backoff_seconds * 2 ** (attempts - 1), 30.0))
+                for item in retry:
+                    self.submit(item)
+
+    def _drain(self) -> List[FeedbackItem]:
+        try:
+            items = [self._items.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(items) < self.drain_size:
+            try:
+                items.append(self._items.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _send(self, item: FeedbackItem) -> bool:
+        try:
+            self.client.create_feedback(
+                run_id=item.run_id,
+                key=item.key,
+                score=item.score,
+                value=item.value,
+                source_info=item.source_info,
+            )
+        except Exception as exc:
+            print(f"Failed to log LangSmith feedback (attempt {item.attempts + 1}): {exc}")
+            return False
+        self.sent += 1
+        return True
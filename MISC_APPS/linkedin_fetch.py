@@ -0,0 +1,215 @@
+"""Concurrent, rate-limited page fetching for app_linked_scraper.py.
+
+Reactions and comments are independent page streams fetched at the same time.
+Each stream keeps a few pages in flight ahead of the last full page, a shared
+semaphore bounds concurrent actor runs, and a token bucket paces run starts:
+it halves its rate on HTTP 429 and creeps back up after successful pages.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
+
+REACTIONS_ACTOR = "apimaestro/linkedin-post-reactions"
+COMMENTS_ACTOR = "apimaestro/linkedin-post-comments-replies-engagements-scraper-no-cookies"
+PAGE_SIZE = 100
+
+
+@dataclass
+class PageSource:
+    kind: str  # "reaction" or "comment"
+    actor_id: str
+    run_input: Callable[[int], Dict[str, Any]]
+
+
+@dataclass
+class Page:
+    kind: str
+    number: int
+    items: List[dict]
+
+
+def reaction_source(post_url: str) -> PageSource:
+    return PageSource("reaction", REACTIONS_ACTOR, lambda page: {
+        "post_url": post_url,
+        "page_number": page,
+        "reaction_type": "ALL",
+        "limit": PAGE_SIZE,
+    })
+
+
+def comment_source(post_id: str) -> PageSource:
+    return PageSource("comment", COMMENTS_ACTOR, lambda page: {
+        "postIds": [post_id],
+        "page_number": page,
+        "limit": PAGE_SIZE,
+    })
+
+
+def is_rate_limited(exc: Exception) -> bool:
+    return getattr(exc, "status_code", None) == 429
+
+
+class TokenBucket:
+    """Additive-increase / multiplicative-decrease limiter for run starts (single event loop)."""
+
+    def __init__(
+        self,
+        rate: float = 2.0,
+        capacity: float = 4.0,
+        min_rate: float = 0.1,
+        max_rate: float = 10.0,
+        increase: float = 0.25,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        while True:
+            now = self._clock()
+            if now < self._blocked_until:
+                await asyncio.sleep(self._blocked_until - now)
+                continue
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def throttle(self, retry_after: Optional[float] = None) -> None:
+        """Back off after a 429: halve the rate and pause new starts."""
+        now = self._clock()
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._refill(now)
+        self._tokens = 0.0
+        self._blocked_until = max(self._blocked_until, now + (retry_after or 1 / self.rate))
+
+    def recover(self) -> None:
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+
+class PageFetcher:
+    def __init__(
+        self,
+        client,
+        max_in_flight: int = 6,
+        prefetch: int = 3,
+        bucket: Optional[TokenBucket] = None,
+        max_attempts: int = 5,
+    ) -> None:
+        """``client`` is an ``ApifyClientAsync``; ``prefetch`` pages run ahead per stream."""
+        self.client = client
+        self.prefetch = prefetch
+        self.max_attempts = max_attempts
+        self.bucket = bucket or TokenBucket()
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def _run_page(self, source: PageSource, number: int) -> List[dict]:
+        run = await self.client.actor(source.actor_id).start(run_input=source.run_input(number))
+        run = await self.client.run(run["id"]).wait_for_finish()
+        if not run or run.get("status") != "SUCCEEDED":
+            raise RuntimeError(f"{source.kind} page {number}: actor run ended as {run and run.get('status')}")
+        return [item async for item in self.client.dataset(run["defaultDatasetId"]).iterate_items()]
+
+    async def fetch_page(self, source: PageSource, number: int) -> List[dict]:
+        for attempt in range(self.max_attempts):
+            await self.bucket.acquire()
+            try:
+                async with self._semaphore:
+                    items = await self._run_page(source, number)
+            except Exception as exc:
+                if attempt == self.max_attempts - 1:
+                    raise
+                if is_rate_limited(exc):
+                    self.bucket.throttle()
+                else:
+                    await asyncio.sleep(min(30.0, 2 ** attempt))
+                continue
+            self.bucket.recover()
+            return items
+
+    async def stream(self, source: PageSource, queue: asyncio.Queue, first_page: int = 1) -> None:
+        """Put pages on ``queue`` from ``first_page`` until a short page, keeping ``prefetch`` pages in flight.
+
+        Pages may arrive out of order; pages after the first short one are dropped.
+        """
+        tasks: Dict[asyncio.Task, int] = {}
+        next_page = first_page
+        last_page: Optional[int] = None
+        try:
+            while True:
+                while last_page is None and len(tasks) < self.prefetch:
+                    tasks[asyncio.create_task(self.fetch_page(source, next_page))] = next_page
+                    next_page += 1
+                if not tasks:
+                    return
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=tasks.get):
+                    number = tasks.pop(task)
+                    items = task.result()
+                    if last_page is not None and number > last_page:
+                        continue
+                    if len(items) < PAGE_SIZE:
+                        last_page = number
+                        for pending, pending_number in list(tasks.items()):
+                            if pending_number > number:
+                                pending.cancel()
+                                del tasks[pending]
+                    if items:
+                        await queue.put(Page(source.kind, number, items))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+async def fetch_pages(
+    client,
+    sources: Sequence[PageSource],
+    first_pages: Optional[Dict[str, int]] = None,
+    **fetcher_options,
+) -> AsyncIterator[Page]:
+    """Run every source concurrently and yield pages as they arrive.
+
+    ``first_pages`` maps a source kind to the page to start from (default 1).
+    """
+    fetcher = PageFetcher(client, **fetcher_options)
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    async def run(source: PageSource) -> None:
+        try:
+            await fetcher.stream(source, queue, (first_pages or {}).get(source.kind, 1))
+        except Exception as exc:
+            await queue.put(exc)
+        else:
+            await queue.put(finished)
+
+    tasks = [asyncio.create_task(run(source)) for source in sources]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            page = await queue.get()
+            if page is finished:
+                remaining -= 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield page
+    finally:
+        for task in tasks:
+            task.cancel()
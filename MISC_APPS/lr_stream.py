@@ -0,0 +1,173 @@
+"""Mini-batch streaming helpers for the logistic-regression demos at scale.
+
+Batches come either from a generator that draws the two blobs on the fly or
+from memory-mapped ``.npy`` files, so millions of points never have to sit in
+memory at once. Plots shade a density image of a subsample instead of
+scattering every point.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+CENTER_SEED = 10  # same centres as make_blobs(centers=2, random_state=10)
+DEFAULT_BATCH_SIZE = 4096
+HOLDOUT_POINTS = 20_000
+HOLDOUT_FRACTION = 0.2  # cap for small files, so some rows are left to train on
+PLOT_SAMPLE = 200_000
+DENSITY_BINS = 200
+CLASS_RGB = np.array([[178, 24, 43], [33, 102, 172]]) / 255  # RdBu end colours
+
+Batch = Tuple[np.ndarray, np.ndarray]
+
+
+@dataclass
+class EpochStats:
+    epoch: int
+    samples: int
+    seconds: float
+    accuracy: float
+    weights: np.ndarray  # (w0, w1, b)
+
+    @property
+    def samples_per_second(self) -> float:
+        return self.samples / self.seconds if self.seconds else 0.0
+
+
+def blob_centers(seed: int = CENTER_SEED) -> np.ndarray:
+    return np.random.RandomState(seed).uniform(-10.0, 10.0, size=(2, 2))
+
+
+def sample_blobs(n: int, std: float, rng: np.random.Generator, centers: np.ndarray) -> Batch:
+    y = rng.integers(0, 2, size=n, dtype=np.int8)
+    X = centers[y] + rng.normal(scale=std, size=(n, 2))
+    return X.astype(np.float32), y
+
+
+def generated_batches(
+    n_points: int,
+    std: float,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    seed: int = 0,
+    rng: Optional[np.random.Generator] = None,
+) -> Iterator[Batch]:
+    """One epoch of i.i.d. mini-batches; the same seed replays the same dataset.
+
+    Each batch is drawn from its own (seed, offset) stream, so passing ``rng``
+    visits the same batches in a shuffled order, like memmap_batches.
+    """
+    centers = blob_centers()
+    starts = np.arange(0, n_points, batch_size)
+    if rng is not None:
+        rng.shuffle(starts)
+    for start in starts:
+        batch_rng = np.random.default_rng([seed, int(start)])
+        yield sample_blobs(min(batch_size, n_points - int(start)), std, batch_rng, centers)
+
+
+def write_blobs_npy(prefix: str, n_points: int, std: float, batch_size: int = DEFAULT_BATCH_SIZE, seed: int = 0) -> None:
+    """Write ``<prefix>_X.npy`` / ``<prefix>_y.npy`` batch by batch."""
+    X = np.lib.format.open_memmap(f"{prefix}_X.npy", mode="w+", dtype=np.float32, shape=(n_points, 2))
+    y = np.lib.format.open_memmap(f"{prefix}_y.npy", mode="w+", dtype=np.int8, shape=(n_points,))
+    offset = 0
+    for X_batch, y_batch in generated_batches(n_points, std, batch_size, seed):
+        X[offset:offset + len(y_batch)] = X_batch
+        y[offset:offset + len(y_batch)] = y_batch
+        offset += len(y_batch)
+    X.flush()
+    y.flush()
+
+
+def holdout_size(n_points: int) -> int:
+    """Rows to hold out of an ``n_points`` file for accuracy."""
+    return min(HOLDOUT_POINTS, int(n_points * HOLDOUT_FRACTION))
+
+
+def load_memmap(prefix: str) -> Batch:
+    return np.load(f"{prefix}_X.npy", mmap_mode="r"), np.load(f"{prefix}_y.npy", mmap_mode="r")
+
+
+def memmap_batches(X: np.ndarray, y: np.ndarray, batch_size: int, rng: np.random.Generator) -> Iterator[Batch]:
+    """Batches in shuffled block order, rows shuffled within each block.
+
+    Contiguous slices keep reads from the memory-mapped file sequential;
+    fancy-indexing random rows across the file would be far slower.
+    """
+    starts = np.arange(0, len(y), batch_size)
+    rng.shuffle(starts)
+    for start in starts:
+        X_batch = np.asarray(X[start:start + batch_size])
+        y_batch = np.asarray(y[start:start + batch_size])
+        order = rng.permutation(len(y_batch))
+        yield X_batch[order], y_batch[order]
+
+
+def holdout_accuracy(weights: np.ndarray, X: np.ndarray, y: np.ndarray) -> float:
+    predicted = (X @ weights[:2] + weights[2]) > 0
+    return float(np.mean(predicted == (y == 1)))
+
+
+def stream_training(
+    model,
+    epoch_batches: Callable[[int], Iterable[Batch]],
+    epochs: int,
+    X_test: np.ndarray,
+    y_test: np.ndarray,
+) -> Iterator[EpochStats]:
+    """Run ``epochs`` passes of partial_fit, yielding stats after each pass.
+
+    ``epoch_batches(epoch)`` returns that epoch's batch iterator; its time is
+    included in the reported throughput.
+    """
+    classes = np.array([0, 1])
+    for epoch in range(epochs):
+        samples = 0
+        start = time.perf_counter()
+        for X_batch, y_batch in epoch_batches(epoch):
+            model.partial_fit(X_batch, y_batch, classes=classes)
+            samples += len(y_batch)
+        seconds = time.perf_counter() - start
+        weights = np.array([model.coef_[0, 0], model.coef_[0, 1], model.intercept_[0]])
+        yield EpochStats(epoch, samples, seconds, holdout_accuracy(weights, X_test, y_test), weights)
+
+
+def sample_rows(X: np.ndarray, y: np.ndarray, limit: int, rng: np.random.Generator) -> Batch:
+    """Uniform subsample for plotting; sorted indices keep memmap reads in order."""
+    if len(y) <= limit:
+        return np.asarray(X), np.asarray(y)
+    index = np.sort(rng.choice(len(y), size=limit, replace=False))
+    return np.asarray(X[index]), np.asarray(y[index])
+
+
+def plot_extent(X: np.ndarray, pad: float = 1.0) -> Tuple[float, float, float, float]:
+    low = np.percentile(X, 0.1, axis=0) - pad
+    high = np.percentile(X, 99.9, axis=0) + pad
+    return float(low[0]), float(high[0]), float(low[1]), float(high[1])
+
+
+def density_image(X: np.ndarray, y: np.ndarray, extent, bins: int = DENSITY_BINS) -> np.ndarray:
+    """RGBA image (origin="lower"): hue is the class mix, opacity is log density."""
+    value_range = [[extent[2], extent[3]], [extent[0], extent[1]]]
+    counts = np.stack([
+        np.histogram2d(X[y == label, 1], X[y == label, 0], bins=bins, range=value_range)[0]
+        for label in (0, 1)
+    ])
+    total = counts.sum(axis=0)
+    share = np.divide(counts[1], total, out=np.zeros_like(total), where=total > 0)
+    rgb = (1 - share)[..., None] * CLASS_RGB[0] + share[..., None] * CLASS_RGB[1]
+    alpha = np.log1p(total) / max(np.log1p(total.max()), 1e-12)
+    return np.dstack([rgb, alpha])
+
+
+def boundary_segment(weights: np.ndarray, extent) -> Tuple[np.ndarray, np.ndarray]:
+    """Endpoints of w0*x + w1*y + b = 0 across the plot extent."""
+    w0, w1, b = weights
+    if abs(w1) >= abs(w0):
+        xs = np.array([extent[0], extent[1]])
+        return xs, -(w0 * xs + b) / w1
+    ys = np.array([extent[2], extent[3]])
+    return -(w1 * ys + b) / w0, ys
@@ -0,0 +1,160 @@
+"""Parallel hyperparameter sweep for the logistic-regression demos.
+
+Every (std, n_points) dataset is generated once in the parent, packed into a
+single shared-memory block and mapped read-only by the worker processes, so
+configurations only ship their index. Accuracy-per-epoch curves come back into
+one ``(n_configs, epochs)`` array.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.datasets import make_blobs
+from sklearn.linear_model import SGDClassifier
+from sklearn.model_selection import train_test_split
+
+SCHEDULES = ["optimal", "constant", "invscaling", "adaptive"]
+ETA0 = 0.01  # initial step for the non-"optimal" schedules
+
+ARRAY_NAMES = ("X_train", "X_test", "y_train", "y_test")
+DataKey = Tuple[float, int]
+# (array name) -> (offset, shape) inside the shared float64 block
+Layout = Dict[DataKey, Dict[str, Tuple[int, Tuple[int, ...]]]]
+
+
+@dataclass(frozen=True)
+class SweepConfig:
+    alpha: float
+    learning_rate: str
+    std: float
+    n_points: int
+
+    @property
+    def data_key(self) -> DataKey:
+        return (self.std, self.n_points)
+
+
+def sweep_grid(
+    alphas: Sequence[float],
+    schedules: Sequence[str],
+    stds: Sequence[float],
+    sizes: Sequence[int],
+) -> List[SweepConfig]:
+    return [SweepConfig(*values) for values in itertools.product(alphas, schedules, stds, sizes)]
+
+
+def make_split(std: float, n_points: int):
+    """Same data as the demos: make_blobs(random_state=10), 80/20 split."""
+    X, y = make_blobs(n_samples=n_points, centers=2, cluster_std=std, random_state=10)
+    return train_test_split(X, y, test_size=0.2, random_state=42)
+
+
+def pack_datasets(keys: Sequence[DataKey]) -> Tuple[shared_memory.SharedMemory, Layout]:
+    splits = {key: dict(zip(ARRAY_NAMES, make_split(*key))) for key in keys}
+    total = sum(array.size for split in splits.values() for array in split.values())
+    block = shared_memory.SharedMemory(create=True, size=max(total, 1) * 8)
+    flat = np.ndarray((total,), dtype=np.float64, buffer=block.buf)
+    layout: Layout = {}
+    offset = 0
+    for key, split in splits.items():
+        layout[key] = {}
+        for name, array in split.items():
+            flat[offset:offset + array.size] = array.ravel()
+            layout[key][name] = (offset, array.shape)
+            offset += array.size
+    return block, layout
+
+
+_BLOCK: Optional[shared_memory.SharedMemory] = None
+_DATA: Dict[DataKey, Dict[str, np.ndarray]] = {}
+_CONFIGS: List[SweepConfig] = []
+
+
+def _attach(block_name: str, layout: Layout, configs: List[SweepConfig]) -> None:
+    """Worker initializer: map the parent's block and build read-only views."""
+    global _BLOCK, _CONFIGS
+    _BLOCK = shared_memory.SharedMemory(name=block_name)
+    flat = np.ndarray((_BLOCK.size // 8,), dtype=np.float64, buffer=_BLOCK.buf)
+    flat.flags.writeable = False
+    for key, arrays in layout.items():
+        _DATA[key] = {
+            name: flat[offset:offset + int(np.prod(shape))].reshape(shape)
+            for name, (offset, shape) in arrays.items()
+        }
+    _CONFIGS = configs
+
+
+def _train(index: int, epochs: int) -> Tuple[int, np.ndarray]:
+    config = _CONFIGS[index]
+    data = _DATA[config.data_key]
+    y_train = data["y_train"].astype(np.int64)
+    y_test = data["y_test"].astype(np.int64)
+    model = SGDClassifier(
+        loss="log_loss",
+        alpha=config.alpha,
+        learning_rate=config.learning_rate,
+        eta0=ETA0,
+        random_state=0,
+    )
+    classes = np.unique(y_train)
+    curve = np.empty(epochs, dtype=np.float32)
+    for epoch in range(epochs):
+        model.partial_fit(data["X_train"], y_train, classes=classes)
+        curve[epoch] = np.mean(model.predict(data["X_test"]) == y_test)
+    return index, curve
+
+
+def run_sweep(configs: Sequence[SweepConfig], epochs: int, max_workers: Optional[int] = None) -> np.ndarray:
+    """Train every configuration in a process pool; return accuracy curves (n_configs, epochs)."""
+    configs = list(configs)
+    curves = np.empty((len(configs), epochs), dtype=np.float32)
+    if not configs:
+        return curves
+    block, layout = pack_datasets(sorted({config.data_key for config in configs}))
+    workers = min(max_workers or os.cpu_count() or 1, len(configs))
+    try:
+        with ProcessPoolExecutor(workers, initializer=_attach, initargs=(block.name, layout, configs)) as pool:
+            indices = range(len(configs))
+            chunksize = max(1, len(configs) // (workers * 4))
+            for index, curve in pool.map(_train, indices, itertools.repeat(epochs), chunksize=chunksize):
+                curves[index] = curve
+    finally:
+        block.close()
+        block.unlink()
+    return curves
+
+
+def plot_sweep(configs: Sequence[SweepConfig], curves: np.ndarray, figure=None):
+    """Small multiples: one panel per (std, n_points) row and alpha column, one line per schedule."""
+    import matplotlib.pyplot as plt
+
+    rows = sorted({config.data_key for config in configs})
+    alphas = sorted({config.alpha for config in configs})
+    fig = figure or plt.figure(figsize=(3 * len(alphas), 2.4 * len(rows)))
+    axes = fig.subplots(len(rows), len(alphas), sharex=True, sharey=True, squeeze=False)
+    epochs = np.arange(1, curves.shape[1] + 1)
+    for config, curve in zip(configs, curves):
+        ax = axes[rows.index(config.data_key)][alphas.index(config.alpha)]
+        ax.plot(epochs, curve * 100, label=config.learning_rate)
+    for (std, n_points), row in zip(rows, axes):
+        row[0].set_ylabel(f"std={std}, n={n_points}\naccuracy %")
+    for alpha, ax in zip(alphas, axes[0]):
+        ax.set_title(f"alpha={alpha:g}")
+    for ax in axes[-1]:
+        ax.set_xlabel("epoch")
+    axes[0][-1].legend(fontsize="small")
+    fig.tight_layout()
+    return fig
+
+
+def best_configs(configs: Sequence[SweepConfig], curves: np.ndarray, top: int = 5) -> List[Tuple[SweepConfig, float]]:
+    final = curves[:, -1]
+    order = np.argsort(-final, kind="stable")[:top]
+    return [(configs[i], float(final[i])) for i in order]
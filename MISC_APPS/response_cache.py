@@ -0,0 +1,161 @@
+"""In-process response cache for repeated questions to the chat agent."""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+EmbedFn = Callable[[str], Sequence[float]]
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    text = re.sub(r"\s+", " ", prompt.strip().lower())
+    return text.rstrip(" ?!.")
+
+
+def prompt_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    scope: str
+    response: str
+    expires_at: float
+    embedding: Optional[np.ndarray] = None
+
+
+class ResponseCache:
+    """LRU + TTL cache of answers keyed on normalized prompt, model and system prompt.
+
+    Exact matches are looked up by hash. When ``embed`` is given, a miss falls
+    back to a semantic tier: the prompt is embedded and compared (cosine) with
+    cached prompts that share the same model and system prompt. The embedding
+    from a miss is kept until the matching ``put`` so each prompt is embedded
+    once. Safe to share across sessions.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 3600,
+        embed: Optional[EmbedFn] = None,
+        similarity_threshold: float = 0.95,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self.clock = clock
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        # key -> embedding from a miss, waiting for its put()
+        self._pending: "OrderedDict[str, Optional[np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def scope_for(model: str, system_prompt: str) -> str:
+        return f"{model}:{prompt_hash(system_prompt)[:16]}"
+
+    def make_key(self, prompt: str, model: str, system_prompt: str) -> str:
+        return prompt_hash(f"{self.scope_for(model, system_prompt)}\n{normalize_prompt(prompt)}")
+
+    def get(self, prompt: str, model: str, system_prompt: str) -> Optional[str]:
+        key = self.make_key(prompt, model, system_prompt)
+        now = self.clock()
+        with self._lock:
+            self._evict_expired(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.response
+
+        if self.embed is not None:
+            query = self._embed(prompt)
+            match = self._semantic_lookup(query, self.scope_for(model, system_prompt))
+            if match is not None:
+                return match
+            self._remember_pending(key, query)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, prompt: str, model: str, system_prompt: str, response: str) -> None:
+        if not response:
+            return
+        scope = self.scope_for(model, system_prompt)
+        key = self.make_key(prompt, model, system_prompt)
+        embedding = None
+        if self.embed is not None:
+            with self._lock:
+                pending = key in self._pending
+                embedding = self._pending.pop(key, None)
+            if not pending:
+                embedding = self._embed(prompt)
+        with self._lock:
+            self._entries[key] = CacheEntry(scope, response, self.clock() + self.ttl_seconds, embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict_expired(self, now: float) -> None:
+        expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+
+    def _embed(self, prompt: str) -> Optional[np.ndarray]:
+        try:
+            vector = np.asarray(self.embed(normalize_prompt(prompt)), dtype=np.float32)
+        except Exception as exc:  # The semantic tier is best-effort
+            print(f"Embedding for response cache failed: {exc}")
+            return None
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else None
+
+    def _remember_pending(self, key: str, embedding: Optional[np.ndarray]) -> None:
+        with self._lock:
+            self._pending[key] = embedding
+            self._pending.move_to_end(key)
+            while len(self._pending) > self.max_entries:
+                self._pending.popitem(last=False)
+
+    def _semantic_lookup(self, query: Optional[np.ndarray], scope: str) -> Optional[str]:
+        if query is None:
+            return None
+        with self._lock:
+            keys: List[str] = []
+            vectors = []
+            for key, entry in self._entries.items():
+                if entry.scope == scope and entry.embedding is not None and entry.embedding.shape == query.shape:
+                    keys.append(key)
+                    vectors.append(entry.embedding)
+            if not vectors:
+                return None
+            scores = np.stack(vectors) @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity_threshold:
+                return None
+            self._entries.move_to_end(keys[best])
+            self.semantic_hits += 1
+            return self._entries[keys[best]].response
@@ -0,0 +1,185 @@
+"""SQLite cache of scraped LinkedIn reactions and comments, keyed by post id.
+
+Items are stored with the page they came from and when it was fetched, and
+are upserted by reactor/comment identity, so re-scrapes merge instead of
+duplicating. Incremental runs resume from the last stored page.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from linkedin_fetch import PAGE_SIZE
+
+KINDS = ("reaction", "comment")
+PERSON_FIELDS = {"reaction": "reactor", "comment": "commenter"}
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+def content_key(item: dict) -> str:
+    """Hash of the item itself, for items with no identity fields."""
+    data = json.dumps(item, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    return "sha256:" + hashlib.sha256(data).hexdigest()[:32]
+
+
+def item_key(kind: str, item: dict) -> str:
+    """Stable identity: the reactor for reactions, the comment (or commenter + text) for comments.
+
+    Items with none of those fall back to a content hash rather than sharing
+    an empty key and overwriting each other.
+    """
+    person = item.get(PERSON_FIELDS[kind]) or {}
+    person_id = person.get("urn") or person.get("id") or person.get("profile_url") or person.get("name") or ""
+    if kind == "comment":
+        comment_id = item.get("comment_id") or item.get("id")
+        if comment_id:
+            return str(comment_id)
+        if person_id or item.get("comment_text"):
+            return f"{person_id}|{item.get('comment_text')}"
+    elif person_id:
+        return str(person_id)
+    return content_key(item)
+
+
+class ScrapeCache:
+    def __init__(self, db_path: str) -> None:
+        self.path = Path(db_path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self.init_db()
+
+    def init_db(self) -> None:
+        with self._lock:
+            self.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS scraped_items (
+                    post_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    item_key TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    item_json TEXT NOT NULL,
+                    fetched_at TEXT NOT NULL,
+                    PRIMARY KEY (post_id, kind, item_key)
+                );
+                CREATE TABLE IF NOT EXISTS scraped_pages (
+                    post_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    item_count INTEGER NOT NULL,
+                    fetched_at TEXT NOT NULL,
+                    PRIMARY KEY (post_id, kind, page)
+                );
+                CREATE INDEX IF NOT EXISTS idx_scraped_items_order
+                    ON scraped_items(post_id, kind, page, position);
+                """
+            )
+            self.conn.commit()
+
+    def save_page(self, post_id: str, kind: str, page: int, items: List[dict]) -> int:
+        """Upsert one fetched page; return how many items were not cached before."""
+        fetched_at = utc_now()
+        rows = [
+            (post_id, kind, item_key(kind, item), page, position, json.dumps(item), fetched_at)
+            for position, item in enumerate(items)
+        ]
+        with self._lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO scraped_items VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            added = self.conn.total_changes - before
+            self.conn.executemany(
+                """
+                UPDATE scraped_items
+                SET page = ?, position = ?, item_json = ?, fetched_at = ?
+                WHERE post_id = ? AND kind = ? AND item_key = ?
+                """,
+                [(r[3], r[4], r[5], r[6], r[0], r[1], r[2]) for r in rows],
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO scraped_pages VALUES (?, ?, ?, ?, ?)",
+                (post_id, kind, page, len(items), fetched_at),
+            )
+        return added
+
+    def resume_pages(self, post_id: str) -> Dict[str, int]:
+        """First page to fetch per kind: the last stored page if it was short (it may have grown), else the next."""
+        rows = self.conn.execute(
+            """
+            SELECT kind, page, item_count FROM scraped_pages p
+            WHERE post_id = ? AND page = (
+                SELECT MAX(page) FROM scraped_pages WHERE post_id = p.post_id AND kind = p.kind
+            )
+            """,
+            (post_id,),
+        ).fetchall()
+        resume = {kind: 1 for kind in KINDS}
+        for row in rows:
+            resume[row["kind"]] = row["page"] + 1 if row["item_count"] >= PAGE_SIZE else row["page"]
+        return resume
+
+    ITEMS_QUERY = """
+        SELECT kind, item_json FROM scraped_items
+        WHERE post_id = ?
+        ORDER BY kind = 'comment', page, position
+        LIMIT ?
+    """
+
+    def load_items(self, post_id: str, limit: int = -1) -> List[Tuple[str, dict]]:
+        """(kind, item) pairs: reactions then comments, in page order."""
+        rows = self.conn.execute(self.ITEMS_QUERY, (post_id, limit)).fetchall()
+        return [(row["kind"], json.loads(row["item_json"])) for row in rows]
+
+    def iter_item_batches(self, post_id: str, batch_size: int = 5000) -> Iterator[List[Tuple[str, dict]]]:
+        """Like load_items, ``batch_size`` rows at a time.
+
+        Uses its own read connection so a long export neither holds the whole
+        result in memory nor interleaves with writes on the shared one.
+        """
+        conn = sqlite3.connect(self.path)
+        try:
+            cursor = conn.execute(self.ITEMS_QUERY, (post_id, -1))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield [(kind, json.loads(item_json)) for kind, item_json in rows]
+        finally:
+            conn.close()
+
+    def counts(self, post_id: str) -> Dict[str, int]:
+        rows = self.conn.execute(
+            "SELECT kind, COUNT(*) AS n FROM scraped_items WHERE post_id = ? GROUP BY kind", (post_id,)
+        ).fetchall()
+        counts = {kind: 0 for kind in KINDS}
+        counts.update({row["kind"]: row["n"] for row in rows})
+        return counts
+
+    def last_fetched(self, post_id: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT MAX(fetched_at) AS fetched_at FROM scraped_pages WHERE post_id = ?", (post_id,)
+        ).fetchone()
+        return row["fetched_at"] if row else None
+
+    def prune(self, post_id: str, before: str) -> int:
+        """After a complete full refresh, drop items and pages not seen since ``before``."""
+        with self._lock, self.conn:
+            removed = self.conn.execute(
+                "DELETE FROM scraped_items WHERE post_id = ? AND fetched_at < ?", (post_id, before)
+            ).rowcount
+            self.conn.execute(
+                "DELETE FROM scraped_pages WHERE post_id = ? AND fetched_at < ?", (post_id, before)
+            )
+        return removed
@@ -0,0 +1,65 @@
+"""Streaming CSV / NDJSON / Parquet export for app_linked_scraper.py.
+
+Rows are written batch by batch into a spooled temporary file, which stays in
+memory while small and rolls over to disk for large posts, so an export never
+needs a DataFrame or the whole file as a string.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import tempfile
+from typing import Iterable, List, Sequence
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+# label -> (file extension, mime type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "NDJSON": ("ndjson", "application/x-ndjson"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def _write_csv(out, batches: Iterable[List[dict]], columns: Sequence[str]) -> None:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(batch)
+        out.write(buffer.getvalue().encode("utf-8"))
+        buffer.seek(0)
+        buffer.truncate()
+    out.write(buffer.getvalue().encode("utf-8"))
+
+
+def _write_ndjson(out, batches: Iterable[List[dict]], columns: Sequence[str]) -> None:
+    for batch in batches:
+        out.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in batch).encode("utf-8"))
+
+
+def _write_parquet(out, batches: Iterable[List[dict]], columns: Sequence[str]) -> None:
+    """One row group per batch; every column is a nullable string."""
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    with pq.ParquetWriter(out, schema) as writer:
+        for batch in batches:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+
+
+WRITERS = {"CSV": _write_csv, "NDJSON": _write_ndjson, "Parquet": _write_parquet}
+
+
+def export_file(batches: Iterable[List[dict]], columns: Sequence[str], fmt: str) -> tempfile.SpooledTemporaryFile:
+    """Write row batches in ``fmt`` and return the spooled file, rewound."""
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    try:
+        WRITERS[fmt](out, batches, columns)
+    except BaseException:
+        out.close()
+        raise
+    out.seek(0)
+    return out
@@ -0,0 +1,224 @@
+"""Local SQLite cache for the Stripe sign-up demo (test_stripe.py).
+
+Keeps the app user / email -> Stripe customer mapping, the outcome of
+checkout sessions that have reached a final state, and the latest state of
+each subscription as reported by webhooks (stripe_webhooks.py), so page
+loads don't have to ask Stripe.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+SETTLED_PAYMENT_STATUSES = {"paid", "no_payment_required"}
+ACTIVE_SUBSCRIPTION_STATUSES = {"active", "trialing"}
+# Where a subscription row came from: its own customer.subscription.* events,
+# or a provisional status inferred from checkout.session.completed.
+SOURCE_SUBSCRIPTION = "subscription"
+SOURCE_CHECKOUT = "checkout"
+
+
+def is_final_session(status: Optional[str], payment_status: Optional[str]) -> bool:
+    """True once a checkout session can't change again, so its outcome is safe to memoize.
+
+    A "complete" session can still be "unpaid" while an async payment method
+    (e.g. a bank debit) settles, so it only counts once the payment has.
+    """
+    return status == "expired" or (status == "complete" and payment_status in SETTLED_PAYMENT_STATUSES)
+
+
+class StripeStore:
+    def __init__(self, db_path: str) -> None:
+        path = Path(db_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self.init_db()
+
+    def init_db(self) -> None:
+        with self._lock:
+            self.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS stripe_customers (
+                    user_id TEXT PRIMARY KEY,
+                    email TEXT NOT NULL,
+                    customer_id TEXT NOT NULL,
+                    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+                );
+                CREATE TABLE IF NOT EXISTS checkout_sessions (
+                    session_id TEXT PRIMARY KEY,
+                    customer_id TEXT,
+                    status TEXT NOT NULL,
+                    payment_status TEXT,
+                    subscription_id TEXT,
+                    verified_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+                );
+                CREATE TABLE IF NOT EXISTS stripe_subscriptions (
+                    subscription_id TEXT PRIMARY KEY,
+                    customer_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    current_period_end INTEGER,
+                    event_created INTEGER NOT NULL,
+                    source TEXT NOT NULL,
+                    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+                );
+                CREATE TABLE IF NOT EXISTS webhook_events (
+                    event_id TEXT PRIMARY KEY,
+                    type TEXT NOT NULL,
+                    received_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+                );
+                CREATE INDEX IF NOT EXISTS idx_stripe_customers_email
+                    ON stripe_customers(email);
+                CREATE INDEX IF NOT EXISTS idx_stripe_subscriptions_customer
+                    ON stripe_subscriptions(customer_id);
+                """
+            )
+            self.conn.commit()
+
+    def customer_for(self, user_id: str, email: str = "") -> Optional[str]:
+        """Customer id for this user, else for any user with the same email."""
+        row = self.conn.execute(
+            """
+            SELECT customer_id FROM stripe_customers
+            WHERE user_id = ? OR email = ?
+            ORDER BY user_id = ? DESC, updated_at DESC
+            LIMIT 1
+            """,
+            (user_id, email.lower(), user_id),
+        ).fetchone()
+        return row["customer_id"] if row else None
+
+    def save_customer(self, user_id: str, email: str, customer_id: str) -> None:
+        with self._lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO stripe_customers (user_id, email, customer_id) VALUES (?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    email = excluded.email,
+                    customer_id = excluded.customer_id,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                (user_id, email.lower(), customer_id),
+            )
+
+    def checkout_session(self, session_id: str) -> Optional[Dict[str, Optional[str]]]:
+        row = self.conn.execute(
+            "SELECT * FROM checkout_sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def save_checkout_session(
+        self,
+        session_id: str,
+        customer_id: Optional[str],
+        status: str,
+        payment_status: Optional[str],
+        subscription_id: Optional[str],
+    ) -> None:
+        """Upsert a session's outcome; a settled payment is never downgraded by a late, older event."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                f"""
+                INSERT INTO checkout_sessions
+                    (session_id, customer_id, status, payment_status, subscription_id)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    customer_id = excluded.customer_id,
+                    status = excluded.status,
+                    payment_status = excluded.payment_status,
+                    subscription_id = COALESCE(excluded.subscription_id, subscription_id),
+                    verified_at = CURRENT_TIMESTAMP
+                WHERE checkout_sessions.payment_status IS NULL
+                   OR checkout_sessions.payment_status NOT IN ({", ".join("?" * len(SETTLED_PAYMENT_STATUSES))})
+                """,
+                (session_id, customer_id, status, payment_status, subscription_id, *sorted(SETTLED_PAYMENT_STATUSES)),
+            )
+
+    def subscription_for(self, customer_id: str) -> Optional[Dict[str, Optional[str]]]:
+        """The customer's current subscription: an active one if any, else the most recently changed."""
+        row = self.conn.execute(
+            f"""
+            SELECT * FROM stripe_subscriptions
+            WHERE customer_id = ?
+            ORDER BY status IN ({", ".join("?" * len(ACTIVE_SUBSCRIPTION_STATUSES))}) DESC,
+                     event_created DESC
+            LIMIT 1
+            """,
+            (customer_id, *sorted(ACTIVE_SUBSCRIPTION_STATUSES)),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def subscription(self, subscription_id: str) -> Optional[Dict[str, Optional[str]]]:
+        row = self.conn.execute(
+            "SELECT * FROM stripe_subscriptions WHERE subscription_id = ?", (subscription_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def apply_subscription(
+        self,
+        subscription_id: str,
+        customer_id: str,
+        status: str,
+        event_created: int,
+        current_period_end: Optional[int] = None,
+        allow_tie: bool = False,
+    ) -> bool:
+        """Record a subscription's state from one of its own events.
+
+        Webhooks can arrive out of order, so a stored state is only replaced by
+        a strictly newer event (``event.created`` has one-second resolution;
+        pass ``allow_tie`` with a freshly retrieved status to settle a tie).
+        Provisional rows from checkout are always replaced.
+        """
+        newer = ">=" if allow_tie else ">"
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                f"""
+                INSERT INTO stripe_subscriptions
+                    (subscription_id, customer_id, status, current_period_end, event_created, source)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(subscription_id) DO UPDATE SET
+                    customer_id = excluded.customer_id,
+                    status = excluded.status,
+                    current_period_end = COALESCE(excluded.current_period_end, current_period_end),
+                    event_created = MAX(excluded.event_created, event_created),
+                    source = excluded.source,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE excluded.event_created {newer} stripe_subscriptions.event_created
+                   OR stripe_subscriptions.source = ?
+                """,
+                (subscription_id, customer_id, status, current_period_end, event_created,
+                 SOURCE_SUBSCRIPTION, SOURCE_CHECKOUT),
+            )
+        return cursor.rowcount > 0
+
+    def add_provisional_subscription(
+        self, subscription_id: str, customer_id: str, status: str, event_created: int
+    ) -> bool:
+        """Status inferred from a completed checkout; ignored once the subscription has its own row."""
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                """
+                INSERT OR IGNORE INTO stripe_subscriptions
+                    (subscription_id, customer_id, status, event_created, source)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (subscription_id, customer_id, status, event_created, SOURCE_CHECKOUT),
+            )
+        return cursor.rowcount > 0
+
+    def seen_event(self, event_id: str) -> bool:
+        return self.conn.execute(
+            "SELECT 1 FROM webhook_events WHERE event_id = ?", (event_id,)
+        ).fetchone() is not None
+
+    def record_event(self, event_id: str, event_type: str) -> None:
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO webhook_events (event_id, type) VALUES (?, ?)",
+                (event_id, event_type),
+            )
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Local Stripe webhook receiver for test_stripe.py.
+
+Verifies the ``Stripe-Signature`` header, then writes checkout and
+subscription state changes into the StripeStore the Streamlit page reads, so
+status is known even for users who never come back to the success URL.
+
+Run it next to the app and forward events to it, e.g.::
+
+    python stripe_webhooks.py --port 4242 --db stripe_local.sqlite3
+    stripe listen --forward-to localhost:4242/webhook
+
+``--replay events.json ...`` applies recorded event payloads (a single event
+or a list) to the store without a server or signature check.
+
+Event ``created`` times have one-second resolution; with an API key the
+receiver settles same-second subscription events by retrieving the
+subscription, otherwise the first one stored wins.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+import stripe
+
+from stripe_store import SETTLED_PAYMENT_STATUSES, StripeStore
+
+WEBHOOK_PATH = "/webhook"
+SIGNATURE_TOLERANCE_SECONDS = 300
+
+# Async payment methods complete the session "unpaid" and settle in a later event.
+CHECKOUT_EVENTS = {
+    "checkout.session.completed",
+    "checkout.session.expired",
+    "checkout.session.async_payment_succeeded",
+    "checkout.session.async_payment_failed",
+}
+# subscription id -> current subscription object, e.g. stripe.Subscription.retrieve
+SubscriptionRetriever = Callable[[str], Dict[str, Any]]
+
+
+def sign_payload(payload: bytes, secret: str, timestamp: Optional[int] = None) -> str:
+    """A ``Stripe-Signature`` header value, as Stripe would send it (for replays and fakes)."""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    signed = f"{timestamp}.".encode("utf-8") + payload
+    signature = hmac.new(secret.encode("utf-8"), signed, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def _id(value: Any) -> Any:
+    """Webhook objects reference related objects by id unless expanded."""
+    return value.get("id") if isinstance(value, dict) else value
+
+
+def apply_subscription_event(
+    store: StripeStore,
+    subscription: Dict[str, Any],
+    created: int,
+    retrieve_subscription: Optional[SubscriptionRetriever] = None,
+) -> bool:
+    customer_id = _id(subscription["customer"])
+    if store.apply_subscription(
+        subscription["id"], customer_id, subscription["status"], created, subscription.get("current_period_end")
+    ):
+        return True
+    stored = store.subscription(subscription["id"])
+    if stored is None or stored["event_created"] != created or retrieve_subscription is None:
+        return False
+    # Same-second events can't be ordered by timestamp; ask Stripe which state is current.
+    current = retrieve_subscription(subscription["id"])
+    return store.apply_subscription(
+        subscription["id"], customer_id, current["status"], created, current.get("current_period_end"), allow_tie=True
+    )
+
+
+def handle_event(
+    store: StripeStore,
+    event: Dict[str, Any],
+    retrieve_subscription: Optional[SubscriptionRetriever] = None,
+) -> bool:
+    """Apply one event to the store; returns False for duplicate, stale and ignored events."""
+    if store.seen_event(event["id"]):
+        return False
+    event_type = event["type"]
+    obj = event["data"]["object"]
+    handled = True
+    if event_type in CHECKOUT_EVENTS:
+        subscription_id = _id(obj.get("subscription"))
+        store.save_checkout_session(
+            obj["id"], _id(obj.get("customer")), obj["status"], obj.get("payment_status"), subscription_id
+        )
+        if subscription_id and obj["status"] == "complete" and obj.get("payment_status") in SETTLED_PAYMENT_STATUSES:
+            # Only a stand-in until the subscription's own events arrive (it may be trialing, say).
+            status = retrieve_subscription(subscription_id)["status"] if retrieve_subscription else "active"
+            store.add_provisional_subscription(subscription_id, _id(obj["customer"]), status, event["created"])
+    elif event_type.startswith("customer.subscription."):
+        handled = apply_subscription_event(store, obj, event["created"], retrieve_subscription)
+    else:
+        handled = False
+    # Every state write above is an idempotent upsert, so recording after the fact is enough.
+    store.record_event(event["id"], event_type)
+    return handled
+
+
+def make_handler(store: StripeStore, secret: str, retrieve_subscription: Optional[SubscriptionRetriever] = None):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format: str, *args) -> None:  # Keep test output clean
+            return
+
+        def _reply(self, status: int, payload: Dict[str, Any]) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self) -> None:
+            if self.path != WEBHOOK_PATH:
+                self._reply(404, {"error": f"Unknown path {self.path}"})
+                return
+            payload = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            try:
+                stripe.Webhook.construct_event(
+                    payload, self.headers.get("Stripe-Signature", ""), secret, SIGNATURE_TOLERANCE_SECONDS
+                )
+            except (ValueError, stripe.SignatureVerificationError) as exc:
+                self._reply(400, {"error": str(exc)})
+                return
+            # Stripe retries non-2xx responses, so only a store failure should produce one.
+            handled = handle_event(store, json.loads(payload), retrieve_subscription)
+            self._reply(200, {"received": True, "handled": handled})
+
+    return Handler
+
+
+def start_receiver(
+    store: StripeStore,
+    secret: str,
+    host: str = "127.0.0.1",
+    port: int = 4242,
+    retrieve_subscription: Optional[SubscriptionRetriever] = None,
+) -> ThreadingHTTPServer:
+    """Serve in a daemon thread; port 0 picks a free port (see server.server_address)."""
+    server = ThreadingHTTPServer((host, port), make_handler(store, secret, retrieve_subscription))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stripe-webhooks", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Receive Stripe webhooks into the local subscription store.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4242)
+    parser.add_argument("--db", default="stripe_local.sqlite3", help="Same file as STRIPE_DB_PATH in the app")
+    parser.add_argument("--secret", default=os.environ.get("STRIPE_WEBHOOK_SECRET"),
+                        help="Signing secret (whsec_...); defaults to $STRIPE_WEBHOOK_SECRET")
+    parser.add_argument("--api-key", default=os.environ.get("STRIPE_SECRET_KEY"),
+                        help="Used to settle same-second events; defaults to $STRIPE_SECRET_KEY")
+    parser.add_argument("--api-base", default=os.environ.get("STRIPE_API_BASE", stripe.api_base))
+    parser.add_argument("--replay", nargs="+", metavar="JSON", help="Apply recorded event files and exit")
+    args = parser.parse_args()
+
+    store = StripeStore(args.db)
+    retrieve_subscription = None
+    if args.api_key:
+        stripe.api_key = args.api_key
+        stripe.api_base = args.api_base
+        retrieve_subscription = stripe.Subscription.retrieve
+    if args.replay:
+        for path in args.replay:
+            with open(path, encoding="utf-8") as handle:
+                events = json.load(handle)
+            for event in events if isinstance(events, list) else [events]:
+                applied = handle_event(store, event, retrieve_subscription)
+                print(f"{event['id']} {event['type']}: {'applied' if applied else 'skipped'}")
+        return
+    if not args.secret:
+        parser.error("--secret or STRIPE_WEBHOOK_SECRET is required to verify signatures")
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(store, args.secret, retrieve_subscription))
+    print(f"Listening for Stripe webhooks on http://{args.host}:{args.port}{WEBHOOK_PATH}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,78 @@
 # streamlit_app.py
+import hashlib
+import uuid
+
 import streamlit as st
 import stripe
 
+from stripe_store import ACTIVE_SUBSCRIPTION_STATUSES, SETTLED_PAYMENT_STATUSES, StripeStore, is_final_session
+from stripe_webhooks import start_receiver
+
 stripe.api_key = st.secrets["STRIPE_SECRET_KEY"]
+# Point at fake_stripe_server.py (or stripe-mock) for offline testing
+stripe.api_base = st.secrets.get("STRIPE_API_BASE", stripe.api_base)
+STRIPE_DB_PATH = st.secrets.get("STRIPE_DB_PATH", "stripe_local.sqlite3")
+# With both set, the app also receives webhooks itself (otherwise run stripe_webhooks.py)
+STRIPE_WEBHOOK_SECRET = st.secrets.get("STRIPE_WEBHOOK_SECRET")
+STRIPE_WEBHOOK_PORT = int(st.secrets.get("STRIPE_WEBHOOK_PORT", 0))
 
 # Keep the customer id across reruns
 if "customer_id" not in st.session_state:
     st.session_state.customer_id = None
 if "subscription_status" not in st.session_state:
     st.session_state.subscription_status = None
+if "checkout_attempt" not in st.session_state:
+    st.session_state.checkout_attempt = uuid.uuid4().hex
 
 # ---- Your app's user system (simplified) ----
 def get_current_user_id() -> str:
     # In real life, return the ID from your auth system / DB
     return "user_123"
 
-def save_stripe_customer_id(user_id: str, customer_id: str):
+@st.cache_resource(show_spinner=False)
+def get_stripe_store():
+    return StripeStore(STRIPE_DB_PATH)
+
+@st.cache_resource(show_spinner=False)
+def start_webhook_receiver():
+    return start_receiver(
+        get_stripe_store(), STRIPE_WEBHOOK_SECRET, port=STRIPE_WEBHOOK_PORT,
+        retrieve_subscription=stripe.Subscription.retrieve,
+    )
+
+def save_stripe_customer_id(user_id: str, customer_id: str, email: str):
     """
-    CALLBACK: implement this to save the mapping in your DB.
-    e.g., UPDATE users SET stripe_customer_id = ... WHERE id = ...
-    For demo, we'll just print.
+    CALLBACK: saves the mapping in the local SQLite store.
+    In real life, e.g. UPDATE users SET stripe_customer_id = ... WHERE id = ...
     """
-    print(f"Save in DB: user {user_id} -> stripe_customer_id {customer_id}")
+    get_stripe_store().save_customer(user_id, email, customer_id)
+
+
+def idempotency_key(*parts: str) -> str:
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
 
 
 # ---- Stripe helpers ----
-def create_or_get_customer(email: str, name: str, user_id: str):
-    # Optional: check if you already created a customer for this email
+def create_or_get_customer(email: str, name: str, user_id: str) -> str:
+    """Return the Stripe customer id, asking Stripe only the first time we see this user/email."""
+    customer_id = get_stripe_store().customer_for(user_id, email)
+    if customer_id:
+        return customer_id
+    # Check if a customer already exists for this email (e.g. created before the local store)
     existing = stripe.Customer.list(email=email, limit=1)
     if existing.data:
-        customer = existing.data[0]
+        customer_id = existing.data[0].id
     else:
-        customer = stripe.Customer.create(
+        customer_id = stripe.Customer.create(
             email=email,
             name=name,
             metadata={"app_user_id": user_id},
-        )
+            # A double-submitted form creates one customer, not two
+            idempotency_key=idempotency_key("customer", user_id, email.lower()),
+        ).id
     # "Callback" to you: store mapping in your DB
-    save_stripe_customer_id(user_id, customer.id)
-    return customer
+    save_stripe_customer_id(user_id, customer_id, email)
+    return customer_id
 
 
 def create_subscription_checkout(customer_id: str):
@@ -60,10 +94,14 @@ def create_subscription_checkout(customer_id: str):
         ],
         success_url=success_url,
         cancel_url=cancel_url,
+        # Repeated clicks in one browser session reuse the same checkout session
+        idempotency_key=idempotency_key("checkout", customer_id, price_id, st.session_state.checkout_attempt),
     )
 
 
 def check_returned_session():
+    # Normally the checkout.session.completed webhook has already stored the outcome;
+    # Stripe is only asked if the user beats the webhook back to the app.
     # Works on Streamlit >=1.37 (query_params); fallback otherwise.
     params = st.query_params if hasattr(st, "query_params") else st.experimental_get_query_params()
     session_id = params.get("session_id")
@@ -72,17 +110,37 @@ def check_returned_session():
     if not session_id:
         return
 
-    try:
-        session = stripe.checkout.Session.retrieve(session_id, expand=["subscription"])
-        if session.status == "complete" and session.payment_status in {"paid", "no_payment_required"}:
-            st.session_state.subscription_status = f"Subscription active. ID: {session.subscription.id}"
-        else:
-            st.session_state.subscription_status = f"Checkout not complete (status={session.status}, payment={session.payment_status})."
-    except Exception as exc:  # noqa: BLE001
-        st.session_state.subscription_status = f"Could not verify checkout: {exc}"
+    store = get_stripe_store()
+    session = store.checkout_session(session_id)
+    if session is None:
+        try:
+            retrieved = stripe.checkout.Session.retrieve(session_id, expand=["subscription"])
+        except Exception as exc:  # noqa: BLE001
+            st.session_state.subscription_status = f"Could not verify checkout: {exc}"
+            return
+        session = {
+            "customer_id": retrieved.customer,
+            "status": retrieved.status,
+            "payment_status": retrieved.payment_status,
+            "subscription_id": retrieved.subscription.id if retrieved.subscription else None,
+        }
+        # Open sessions and pending async payments can still change, so only final outcomes are memoized
+        if is_final_session(session["status"], session["payment_status"]):
+            store.save_checkout_session(session_id, **session)
+            st.session_state.checkout_attempt = uuid.uuid4().hex
+
+    if session["status"] == "complete" and session["payment_status"] in SETTLED_PAYMENT_STATUSES:
+        st.session_state.subscription_status = f"Subscription active. ID: {session['subscription_id']}"
+    else:
+        st.session_state.subscription_status = f"Checkout not complete (status={session['status']}, payment={session['payment_status']})."
 
 
 # ---- Streamlit UI ----
+if STRIPE_WEBHOOK_SECRET and STRIPE_WEBHOOK_PORT:
+    start_webhook_receiver()
+if st.session_state.customer_id is None:
+    st.session_state.customer_id = get_stripe_store().customer_for(get_current_user_id())
+
 st.title("Sign up")
 
 with st.form("signup_form"):
@@ -95,16 +153,20 @@ if submitted:
         st.error("Please provide name and email.")
     else:
         user_id = get_current_user_id()
-        customer = create_or_get_customer(email=email, name=name, user_id=user_id)
-        st.session_state.customer_id = customer.id
-        st.success(f"Welcome, {name}! Your Stripe customer ID is {customer.id}")
+        st.session_state.customer_id = create_or_get_customer(email=email, name=name, user_id=user_id)
+        st.success(f"Welcome, {name}! Your Stripe customer ID is {st.session_state.customer_id}")
 
-# If coming back from Stripe, verify and show status
+# If coming back from Stripe, verify; then show the webhook-maintained status (one local lookup)
 check_returned_session()
-if st.session_state.subscription_status:
+subscription = None
+if st.session_state.customer_id:
+    subscription = get_stripe_store().subscription_for(st.session_state.customer_id)
+if subscription:
+    st.info(f"Subscription {subscription['status']}. ID: {subscription['subscription_id']}")
+elif st.session_state.subscription_status:
     st.info(st.session_state.subscription_status)
 
-if st.session_state.customer_id:
+if st.session_state.customer_id and not (subscription and subscription["status"] in ACTIVE_SUBSCRIPTION_STATUSES):
     st.subheader("Subscribe to the monthly plan")
     if st.button("Start subscription"):
         try: